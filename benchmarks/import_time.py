@@ -0,0 +1,72 @@
+"""Import-time budget of the SDK entry points.
+
+Each statement is timed in a fresh interpreter (median of several runs) and checked against its budget,
+light entry points must also not load the HTTP stack. Exits with status 1 when a budget is exceeded.
+
+Usage:
+    python benchmarks/import_time.py [--runs 7]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# statement: (budget in milliseconds, modules that must not be loaded)
+BUDGETS = {
+    "import service_now_api_sdk.sdk": (5, ["requests"]),
+    "from service_now_api_sdk.sdk.servicenow.helpers.query_builder import QueryBuilder": (
+        20,
+        ["requests", "six"],
+    ),
+    "from service_now_api_sdk.sdk import aux_functions": (20, ["requests"]),
+    "from service_now_api_sdk.sdk import Records": (80, ["requests"]),
+}
+
+SCRIPT = """
+import json, sys, time
+started_at = time.perf_counter()
+{statement}
+elapsed = (time.perf_counter() - started_at) * 1000
+print(json.dumps({{"elapsed": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+def measure(statement: str, runs: int) -> tuple:
+    timings = []
+    modules = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", SCRIPT.format(statement=statement)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        result = json.loads(output)
+        timings.append(result["elapsed"])
+        modules = result["modules"]
+    return statistics.median(timings), modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=7)
+    args = parser.parse_args()
+
+    failed = False
+    for statement, (budget, forbidden) in BUDGETS.items():
+        elapsed, modules = measure(statement, args.runs)
+        loaded = [module for module in forbidden if module in modules]
+        ok = elapsed <= budget and not loaded
+        failed = failed or not ok
+
+        print(
+            f"{'ok  ' if ok else 'FAIL'} {elapsed:7.1f} ms (budget {budget} ms) {statement}"
+            + (f" loaded {', '.join(loaded)}" if loaded else "")
+        )
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
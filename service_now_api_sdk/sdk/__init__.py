@@ -1,3 +1,37 @@
-from .servicenow.attachments.client import Attachment
-from .servicenow.table.client import Manager, ProducerServiceCatalog, Records, Vars
-from .servicenow.utils import aux_functions as aux_functions
\ No newline at end of file
+# API classes are imported on first access, so importing a light helper
+# (e.g. QueryBuilder or aux_functions) does not load every API module and the HTTP stack
+from importlib import import_module
+
+_lazy_attributes = {
+    "Aggregate": ("service_now_api_sdk.sdk.servicenow.aggregate.client", "Aggregate"),
+    "Attachment": ("service_now_api_sdk.sdk.servicenow.attachments.client", "Attachment"),
+    "ImportSet": ("service_now_api_sdk.sdk.servicenow.import_set.client", "ImportSet"),
+    "Manager": ("service_now_api_sdk.sdk.servicenow.table.client", "Manager"),
+    "Mirror": ("service_now_api_sdk.sdk.servicenow.mirror.client", "Mirror"),
+    "ProducerServiceCatalog": (
+        "service_now_api_sdk.sdk.servicenow.table.client",
+        "ProducerServiceCatalog",
+    ),
+    "Records": ("service_now_api_sdk.sdk.servicenow.table.client", "Records"),
+    "Vars": ("service_now_api_sdk.sdk.servicenow.table.client", "Vars"),
+    "aux_functions": ("service_now_api_sdk.sdk.servicenow.utils.aux_functions", None),
+}
+
+__all__ = sorted(_lazy_attributes)
+
+
+def __getattr__(name):
+    if name not in _lazy_attributes:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module_name, attribute = _lazy_attributes[name]
+    value = import_module(module_name)
+    if attribute:
+        value = getattr(value, attribute)
+
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,281 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Union
+
+from service_now_api_sdk.sdk.servicenow.aggregate.exceptions import AggregateException
+from service_now_api_sdk.sdk.servicenow.helpers.client import Client
+from service_now_api_sdk.sdk.servicenow.helpers.query_builder import QueryBuilder
+from service_now_api_sdk.sdk.servicenow.helpers.scheduler import DEFAULT
+
+StatValue = Optional[Union[float, str]]
+
+
+def _parse_stat_value(value) -> StatValue:
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        # min/max of date and string fields are returned as is
+        return value
+
+
+@dataclass
+class AggregateResult:
+    """Statistics of one group (or of the whole query when there is no group by)
+
+    Attributes:
+        count (int): number of records, when count was requested.
+        avg (dict): average by field name.
+        min (dict): minimum value by field name.
+        max (dict): maximum value by field name.
+        sum (dict): sum by field name.
+        group_by (dict): value of each group by field for this group.
+    """
+
+    count: Optional[int] = None
+    avg: Dict[str, StatValue] = field(default_factory=dict)
+    min: Dict[str, StatValue] = field(default_factory=dict)
+    max: Dict[str, StatValue] = field(default_factory=dict)
+    sum: Dict[str, StatValue] = field(default_factory=dict)
+    group_by: Dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_response(cls, data: dict):
+        stats = data.get("stats", {})
+        count = stats.get("count")
+
+        return cls(
+            count=int(count) if count not in (None, "") else None,
+            avg={k: _parse_stat_value(v) for k, v in stats.get("avg", {}).items()},
+            min={k: _parse_stat_value(v) for k, v in stats.get("min", {}).items()},
+            max={k: _parse_stat_value(v) for k, v in stats.get("max", {}).items()},
+            sum={k: _parse_stat_value(v) for k, v in stats.get("sum", {}).items()},
+            group_by={
+                group.get("field"): group.get("value")
+                for group in data.get("groupby_fields", [])
+            },
+        )
+
+
+class BaseAggregateAPI:
+    request_priority = DEFAULT
+
+    def __init__(self, table: str, client: Client = None) -> None:
+        self.default_path = "api/now/stats"
+        self.http_client = client or Client()
+        self.table = table
+
+    def priority(self, priority: str):
+        """Priority class of the requests when the client schedules them (see Client.schedule):
+        interactive, default or bulk
+
+        Args:
+            priority (str): interactive, default or bulk
+
+        Returns:
+            Aggregate: Return self class
+        """
+        self.request_priority = priority
+        return self
+
+
+class Aggregate(BaseAggregateAPI):
+    """Allows you to compute statistics (count, avg, min, max and sum) on tables in the server side
+    Ref. link: https://docs.servicenow.com/bundle/quebec-application-development/page/integrate/inbound-rest/concept/c_AggregateAPI.html
+    """
+
+    def __init__(self, table: str, client: Client = None):
+        super().__init__(table=table, client=client)
+        self.sysparm_count: bool = False
+        self.sysparm_avg_fields: List[str] = []
+        self.sysparm_min_fields: List[str] = []
+        self.sysparm_max_fields: List[str] = []
+        self.sysparm_sum_fields: List[str] = []
+        self.sysparm_group_by: List[str] = []
+        self.sysparm_having: List[str] = []
+        self.sysparm_order_by: List[str] = []
+        self.sysparm_display_value = False
+        self.response_timeout: int = 300
+        self.query = QueryBuilder()
+
+    def count(self, count: bool = True):
+        """Compute the number of records matching the query (default: false)
+
+        Args:
+            count (bool): True to compute the number of records
+
+        Returns:
+            Aggregate: Return self class
+        """
+        self.sysparm_count = count
+        return self
+
+    def avg(self, fields: list):
+        """List of fields to compute the average
+
+        Args:
+            fields (list): List of numeric fields
+
+        Returns:
+            Aggregate: Return self class
+        """
+        self.sysparm_avg_fields = list(fields)
+        return self
+
+    def min(self, fields: list):
+        """List of fields to compute the minimum value
+
+        Args:
+            fields (list): List of fields
+
+        Returns:
+            Aggregate: Return self class
+        """
+        self.sysparm_min_fields = list(fields)
+        return self
+
+    def max(self, fields: list):
+        """List of fields to compute the maximum value
+
+        Args:
+            fields (list): List of fields
+
+        Returns:
+            Aggregate: Return self class
+        """
+        self.sysparm_max_fields = list(fields)
+        return self
+
+    def sum(self, fields: list):
+        """List of fields to compute the sum
+
+        Args:
+            fields (list): List of numeric fields
+
+        Returns:
+            Aggregate: Return self class
+        """
+        self.sysparm_sum_fields = list(fields)
+        return self
+
+    def group_by(self, fields: list):
+        """List of fields to group the results by
+
+        Args:
+            fields (list): List of fields
+
+        Returns:
+            Aggregate: Return self class
+        """
+        self.sysparm_group_by = list(fields)
+        return self
+
+    def having(self, aggregate: str, field: str, operator: str, value):
+        """Add a filter based on an aggregate operation, e.g. having("count", "priority", ">", 3)
+
+        Args:
+            aggregate (str): Aggregate operation (count, avg, min, max or sum)
+            field (str): Field to aggregate
+            operator (str): Comparison operator (=, !=, >, >=, < or <=)
+            value (int | float | str): Value to compare with
+
+        Returns:
+            Aggregate: Return self class
+        """
+        self.sysparm_having.append(f"{aggregate}^{field}^{operator}^{value}")
+        return self
+
+    def order_by(self, fields: list):
+        """List of fields to order the groups by, e.g. ["AVG^priority^DESC", "category"]
+
+        Args:
+            fields (list): List of fields (or aggregate^field^direction expressions)
+
+        Returns:
+            Aggregate: Return self class
+        """
+        self.sysparm_order_by = list(fields)
+        return self
+
+    def display_value(self, display: str):
+        """Return field display values (true), actual values (false), or both (all) (default: false).
+
+        Args:
+            display (str): Return field display values (default: false).
+
+        Returns:
+            Aggregate: Return self class
+        """
+        self.sysparm_display_value = display
+        return self
+
+    def timeout(self, timeout: int):
+        """Time to get error on try request data (default: 300)
+
+        Args:
+            timeout (int): time to get error on try request data (default: 300)
+
+        Returns:
+            Aggregate: Return self class
+        """
+        self.response_timeout = timeout
+        return self
+
+    def _get_params(self) -> dict:
+        params = {}
+
+        if self.query._query:
+            params["sysparm_query"] = str(self.query)
+
+        if self.sysparm_count:
+            params["sysparm_count"] = self.sysparm_count
+
+        if self.sysparm_avg_fields:
+            params["sysparm_avg_fields"] = ",".join(self.sysparm_avg_fields)
+
+        if self.sysparm_min_fields:
+            params["sysparm_min_fields"] = ",".join(self.sysparm_min_fields)
+
+        if self.sysparm_max_fields:
+            params["sysparm_max_fields"] = ",".join(self.sysparm_max_fields)
+
+        if self.sysparm_sum_fields:
+            params["sysparm_sum_fields"] = ",".join(self.sysparm_sum_fields)
+
+        if self.sysparm_group_by:
+            params["sysparm_group_by"] = ",".join(self.sysparm_group_by)
+
+        if self.sysparm_having:
+            params["sysparm_having"] = ",".join(self.sysparm_having)
+
+        if self.sysparm_order_by:
+            params["sysparm_order_by"] = ",".join(self.sysparm_order_by)
+
+        if self.sysparm_display_value:
+            params["sysparm_display_value"] = self.sysparm_display_value
+
+        return params
+
+    def get(self) -> List[AggregateResult]:
+        """Run the aggregation in the server side.
+        Ref. link: https://docs.servicenow.com/bundle/quebec-application-development/page/integrate/inbound-rest/concept/c_AggregateAPI.html#aggregate-GET-stats
+
+        Returns:
+            list: one AggregateResult by group, or a single one when there is no group by.
+        """
+        result = self.http_client.get(
+            f"{self.default_path}/{self.table}",
+            params=self._get_params(),
+            timeout=self.response_timeout,
+            priority=self.request_priority,
+        )
+
+        data = result.json()
+        if result.status_code != 200:
+            raise AggregateException(data)
+
+        stats = data.get("result", [])
+        if isinstance(stats, dict):
+            stats = [stats]
+
+        return [AggregateResult.from_response(group) for group in stats]
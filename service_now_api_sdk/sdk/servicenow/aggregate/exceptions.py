@@ -0,0 +1,5 @@
+from service_now_api_sdk.exceptions import ITSMException
+
+
+class AggregateException(ITSMException):
+    pass
@@ -0,0 +1,182 @@
+import hashlib
+import os
+import re
+import time
+
+from service_now_api_sdk.sdk.servicenow.helpers.sqlite import connect
+
+# hex digests only, the hash of the metadata becomes a path in the cache directory
+_HASH = re.compile(r"^[0-9a-fA-F]{16,128}$")
+
+
+def _content_hash(metadata: dict) -> str:
+    """Returns the hash of the attachment metadata, None when it is missing or not a hex digest"""
+    content_hash = metadata.get("hash")
+    if isinstance(content_hash, str) and _HASH.match(content_hash):
+        return content_hash
+    return None
+
+
+class AttachmentCache:
+    """Content addressed on-disk cache of attachment files.
+    Entries are keyed by attachment sys_id and validated against the size_bytes and hash fields of the
+    attachment metadata, files with identical content are stored once. Attachments whose hash is not a hex digest
+    are stored under the sha256 of their content and never returned from the cache.
+
+    Args:
+        directory (str): cache directory, created if it does not exist.
+        max_bytes (int): maximum size of stored files, least recently used are evicted first (default: 1GB).
+        max_age (int): seconds without access before a file is evicted (default: 7 days).
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 1024 * 1024 * 1024,
+        max_age: int = 7 * 24 * 60 * 60,
+    ) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+
+        with self.__connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "sys_id TEXT PRIMARY KEY, hash TEXT NOT NULL, size_bytes INTEGER NOT NULL)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS objects ("
+                "hash TEXT PRIMARY KEY, size_bytes INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+
+    def __connect(self):
+        return connect(os.path.join(self.directory, "index.sqlite"))
+
+    def object_path(self, content_hash: str) -> str:
+        if not _HASH.match(content_hash):
+            raise ValueError(f"Invalid content hash {content_hash!r}")
+        return os.path.join(self.directory, "objects", content_hash[:2], content_hash)
+
+    def get(self, metadata: dict) -> str:
+        """Returns the path of the cached file of an attachment, or None when it is missing or has changed
+
+        Args:
+            metadata (dict): attachment metadata, as returned by the Attachment API.
+
+        Returns:
+            str: path of cached file
+        """
+        metadata_hash = _content_hash(metadata)
+        if metadata.get("hash") and metadata_hash is None:
+            return None
+
+        with self.__connect() as connection:
+            entry = connection.execute(
+                "SELECT hash, size_bytes FROM entries WHERE sys_id = ?",
+                (metadata.get("sys_id"),),
+            ).fetchone()
+
+            if entry is None and metadata_hash:
+                # another attachment with the same content is already stored
+                entry = connection.execute(
+                    "SELECT hash, size_bytes FROM objects WHERE hash = ?",
+                    (metadata_hash,),
+                ).fetchone()
+                if entry is not None:
+                    connection.execute(
+                        "INSERT OR REPLACE INTO entries (sys_id, hash, size_bytes) VALUES (?, ?, ?)",
+                        (metadata.get("sys_id"), *entry),
+                    )
+
+            if entry is None:
+                return None
+
+            content_hash, size_bytes = entry
+            if metadata_hash and metadata_hash != content_hash:
+                return None
+
+            if metadata.get("size_bytes") and int(metadata["size_bytes"]) != size_bytes:
+                return None
+
+            path = self.object_path(content_hash)
+            if not os.path.exists(path):
+                connection.execute(
+                    "DELETE FROM entries WHERE sys_id = ?", (metadata.get("sys_id"),)
+                )
+                return None
+
+            connection.execute(
+                "UPDATE objects SET last_access = ? WHERE hash = ?",
+                (time.time(), content_hash),
+            )
+            return path
+
+    def put(self, metadata: dict, content: bytes) -> str:
+        """Stores the content of an attachment
+
+        Args:
+            metadata (dict): attachment metadata, as returned by the Attachment API.
+            content (bytes): attachment content.
+
+        Returns:
+            str: path of cached file
+        """
+        content_hash = _content_hash(metadata) or hashlib.sha256(content).hexdigest()
+        path = self.object_path(content_hash)
+
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, mode="wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+
+        with self.__connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO objects (hash, size_bytes, last_access) VALUES (?, ?, ?)",
+                (content_hash, len(content), time.time()),
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO entries (sys_id, hash, size_bytes) VALUES (?, ?, ?)",
+                (metadata.get("sys_id"), content_hash, len(content)),
+            )
+
+        self.evict()
+        return path
+
+    def evict(self):
+        """Removes files not accessed for max_age seconds, then the least recently used ones
+        until the cache size is below max_bytes"""
+        with self.__connect() as connection:
+            objects = connection.execute(
+                "SELECT hash, size_bytes, last_access FROM objects ORDER BY last_access DESC"
+            ).fetchall()
+
+            expired_before = time.time() - self.max_age
+            total_bytes = 0
+            evicted = []
+            for content_hash, size_bytes, last_access in objects:
+                if last_access < expired_before:
+                    evicted.append(content_hash)
+                elif total_bytes + size_bytes > self.max_bytes:
+                    evicted.append(content_hash)
+                else:
+                    total_bytes += size_bytes
+
+            self.__remove(connection, evicted)
+
+    def clear(self):
+        """Removes all cached files"""
+        with self.__connect() as connection:
+            objects = connection.execute("SELECT hash FROM objects").fetchall()
+            self.__remove(connection, [content_hash for content_hash, in objects])
+
+    def __remove(self, connection, hashes: list):
+        for content_hash in hashes:
+            connection.execute("DELETE FROM objects WHERE hash = ?", (content_hash,))
+            connection.execute("DELETE FROM entries WHERE hash = ?", (content_hash,))
+            try:
+                os.remove(self.object_path(content_hash))
+            except FileNotFoundError:
+                pass
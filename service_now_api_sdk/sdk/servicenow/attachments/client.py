@@ -1,21 +1,80 @@
+import mimetypes
 import os
+import shutil
+import uuid
 from time import sleep
 
+from service_now_api_sdk.sdk.servicenow.attachments.cache import AttachmentCache
 from service_now_api_sdk.sdk.servicenow.attachments.exceptions import (
     DeleteAttachment,
     DownloadAttachment,
     RecordFilterException,
+    UploadAttachment,
 )
+from service_now_api_sdk.sdk.servicenow.helpers.bulk import BulkResult, run_concurrently
 from service_now_api_sdk.sdk.servicenow.helpers.client import Client
 from service_now_api_sdk.sdk.servicenow.helpers.query_builder import QueryBuilder
+from service_now_api_sdk.sdk.servicenow.helpers.scheduler import DEFAULT
+
+
+def _read_chunks(file, chunk_size: int):
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _quote(value) -> str:
+    """Quoted parameter of a Content-Disposition header, escaped as browsers do (RFC 7578)"""
+    value = str(value).replace('"', "%22").replace("\r", "%0D").replace("\n", "%0A")
+    return f'"{value}"'
+
+
+def _multipart_body(boundary: str, fields: dict, file_name: str, content_type: str, chunks):
+    for name, value in fields.items():
+        yield (
+            f"--{boundary}\r\n"
+            f"Content-Disposition: form-data; name={_quote(name)}\r\n\r\n"
+            f"{value}\r\n"
+        ).encode("utf-8")
+
+    yield (
+        f"--{boundary}\r\n"
+        f"Content-Disposition: form-data; name=\"uploadFile\"; filename={_quote(file_name)}\r\n"
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode("utf-8")
+    for chunk in chunks:
+        yield chunk
+    yield f"\r\n--{boundary}--\r\n".encode("utf-8")
 
 
 class BaseAttachmentsAPI:
     default_path = "api/now/attachment"
-    http_client = Client()
+    shared_http_client: Client = None
+    request_priority = DEFAULT
 
-    def __init__(self) -> None:
+    def __init__(self, client: Client = None) -> None:
         super().__init__()
+        if client is None:
+            # created with the first instance, not at import
+            if BaseAttachmentsAPI.shared_http_client is None:
+                BaseAttachmentsAPI.shared_http_client = Client()
+            client = BaseAttachmentsAPI.shared_http_client
+        self.http_client = client
+
+    def priority(self, priority: str):
+        """Priority class of the requests when the client schedules them (see Client.schedule):
+        interactive, default or bulk
+
+        Args:
+            priority (str): interactive, default or bulk
+
+        Returns:
+            Attachment: Return self class
+        """
+        self.request_priority = priority
+        return self
 
 
 class Attachment(BaseAttachmentsAPI):
@@ -26,10 +85,11 @@ class Attachment(BaseAttachmentsAPI):
     sysparm_limit = None
     sysparm_offset = None
     query = None
+    attachment_cache: AttachmentCache = None
     __file = []
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, client: Client = None):
+        super().__init__(client=client)
         self.query = QueryBuilder()
 
     def __request_helper(self, data=[], next_link="", retries=5):
@@ -39,9 +99,17 @@ class Attachment(BaseAttachmentsAPI):
             current_data = []
 
             if next_link:
-                result = self.http_client.get(next_link, params=params)
+                result = self.http_client.get(
+                    next_link,
+                    params=params,
+                    priority=self.request_priority,
+                )
             else:
-                result = self.http_client.get(f"{self.default_path}", params=params)
+                result = self.http_client.get(
+                    f"{self.default_path}",
+                    params=params,
+                    priority=self.request_priority,
+                )
 
             if result.status_code != 200:
                 text = result.text
@@ -55,7 +123,7 @@ class Attachment(BaseAttachmentsAPI):
                     next_link = (
                         result.links.get("next", {})
                         .get("url", "")
-                        .replace(f"{os.environ['SERVICENOW_URL']}/", "")
+                        .replace(f"{self.http_client.base_url}/", "")
                     )
                     data = self.__request_helper(data, next_link=next_link)
 
@@ -117,7 +185,10 @@ class Attachment(BaseAttachmentsAPI):
         Returns:
             dict: metadata registers result. Ref. link: https://docs.servicenow.com/bundle/quebec-application-development/page/integrate/inbound-rest/concept/c_AttachmentAPI.html#attachment-GET-sys_id
         """
-        result = self.http_client.get(path=f"{self.default_path}/{sys_id}")
+        result = self.http_client.get(
+            path=f"{self.default_path}/{sys_id}",
+            priority=self.request_priority,
+        )
 
         data = result.json()
         if result.status_code != 200:
@@ -125,7 +196,36 @@ class Attachment(BaseAttachmentsAPI):
 
         return data.get("result")
 
-    def download_file(self, sys_id: str, folder_path: str = "", file_name: str = None):
+    def cache(self, cache: AttachmentCache):
+        """Keep downloaded files in a local cache, unchanged attachments are not downloaded again (default: disabled)
+
+        Args:
+            cache (AttachmentCache): cache to use, None to disable
+
+        Returns:
+            Attachment: Return self class
+        """
+        self.attachment_cache = cache
+        return self
+
+    def __download_content(self, sys_id: str) -> bytes:
+        result = self.http_client.get(
+            path=f"{self.default_path}/{sys_id}/file",
+            priority=self.request_priority,
+        )
+
+        if result.status_code != 200:
+            raise DownloadAttachment(result.json())
+
+        return result.content
+
+    def download_file(
+        self,
+        sys_id: str,
+        folder_path: str = "",
+        file_name: str = None,
+        metadata: dict = None,
+    ):
         """Download a servicenow file to locally storage.
         Ref. link: https://docs.servicenow.com/bundle/quebec-application-development/page/integrate/inbound-rest/concept/c_AttachmentAPI.html#attachment-GET-file
 
@@ -133,62 +233,281 @@ class Attachment(BaseAttachmentsAPI):
             sys_id (str, mandatory): Sys_id of the attachment record from which to return binary data.
             folder_path (str, optional): Folder to store file.
             file_name (str, optional): File name to create locally file. If not defined, the raw name it will be used.
+            metadata (dict, optional): Attachment metadata already known (e.g. from get_files_metadata), avoids requesting it.
 
         Returns:
             file_path (str): path of file.
         """
-        metadata = self.retrieve_file_metadata(sys_id=sys_id)
+        if metadata is None:
+            metadata = self.retrieve_file_metadata(sys_id=sys_id)
 
         if not file_name:
             file_name = metadata.get("file_name")
 
-        result = self.http_client.get(path=f"{self.default_path}/{sys_id}/file")
+        file_path = f"{folder_path}/{file_name}"
 
-        binary = result.content
-        if result.status_code != 200:
-            raise DownloadAttachment(result.json())
+        cached_path = None
+        if self.attachment_cache:
+            cached_path = self.attachment_cache.get(metadata)
 
-        file_path = f"{folder_path}/{file_name}"
+        if cached_path:
+            shutil.copyfile(cached_path, file_path)
+            return file_path
+
+        binary = self.__download_content(sys_id)
+        if self.attachment_cache:
+            self.attachment_cache.put(metadata, binary)
 
         with open(file=file_path, mode="wb") as f:
             f.write(binary)
 
         return file_path
 
-    def download_file_buffer(self, sys_id: str):
+    def download_file_buffer(self, sys_id: str, metadata: dict = None):
         """Returns the bytes array of file attachment with a specific sys_id value.
         Ref. link: https://docs.servicenow.com/bundle/quebec-application-development/page/integrate/inbound-rest/concept/c_AttachmentAPI.html#attachment-GET-file
 
         Args:
             sys_id (str, mandatory): Sys_id of the attachment record from which to return binary data.
+            metadata (dict, optional): Attachment metadata already known (e.g. from get_files_metadata).
+                Only used with cache, avoids requesting it.
 
         Returns:
             bytearray: the file buffer content.
         """
-        result = self.http_client.get(path=f"{self.default_path}/{sys_id}/file")
+        if not self.attachment_cache:
+            return self.__download_content(sys_id)
 
-        if result.status_code != 200:
-            raise DownloadAttachment(result.json())
+        if metadata is None:
+            metadata = self.retrieve_file_metadata(sys_id=sys_id)
 
-        binary = result.content
+        cached_path = self.attachment_cache.get(metadata)
+        if cached_path:
+            with open(file=cached_path, mode="rb") as f:
+                return f.read()
+
+        binary = self.__download_content(sys_id)
+        self.attachment_cache.put(metadata, binary)
 
         return binary
 
-    def delete_file(self, sys_id: str):
+    def delete_file(self, sys_id: str, fetch_metadata: bool = True):
         """This method deletes the attachment with a specific sys_id value.
         Ref. link: https://docs.servicenow.com/bundle/quebec-application-development/page/integrate/inbound-rest/concept/c_AttachmentAPI.html#attachment-DELETE
 
         Args:
             sys_id (str, mandatory): Sys_id value of the attachment to delete.
+            fetch_metadata (bool, optional): Request the metadata before deleting (default: true).
 
         Returns:
-            dict: metadata of file that has been deleted.
+            dict: metadata of file that has been deleted, None if fetch_metadata is false.
         """
-        metadata = self.retrieve_file_metadata(sys_id=sys_id)
+        metadata = None
+        if fetch_metadata:
+            metadata = self.retrieve_file_metadata(sys_id=sys_id)
 
-        result = self.http_client.delete(path=f"{self.default_path}/{sys_id}")
+        result = self.http_client.delete(
+            path=f"{self.default_path}/{sys_id}",
+            priority=self.request_priority,
+        )
 
         if result.status_code != 204:
-            raise DeleteAttachment(result.json)
+            raise DeleteAttachment(result.json())
 
         return metadata
+
+    def delete_files(
+        self,
+        sys_ids: list = None,
+        query: QueryBuilder = None,
+        max_workers: int = 4,
+        fetch_metadata: bool = False,
+    ) -> BulkResult:
+        """Deletes many attachments, with at most max_workers deletes at the same time.
+        A failed delete does not stop the others.
+
+        Args:
+            sys_ids (list, optional): Sys_ids of attachments to delete.
+            query (QueryBuilder, optional): Query of attachments to delete, used when sys_ids is not defined.
+            max_workers (int, optional): Maximum number of concurrent deletes (default: 4).
+            fetch_metadata (bool, optional): Request the metadata before each delete (default: false).
+                Not needed with query, the metadata comes from the listing.
+
+        Returns:
+            BulkResult: one BulkItemResult by sys_id, with the metadata of file (if known) as result.
+            DeleteAttachment is raised when the attachments of query cannot be listed.
+        """
+        listed_metadata = {}
+        if sys_ids is None:
+            if query is None:
+                raise DeleteAttachment("sys_ids or query is required")
+
+            listing = Attachment(client=self.http_client)
+            listing.query = query
+            listed = listing.get_files_metadata()
+            # None when the listing failed, deleting nothing would look like a success
+            if listed is None:
+                raise DeleteAttachment("attachments of query could not be listed")
+
+            listed_metadata = {metadata["sys_id"]: metadata for metadata in listed}
+            sys_ids = list(listed_metadata)
+
+        def delete(sys_id):
+            metadata = self.delete_file(sys_id, fetch_metadata=fetch_metadata)
+            return metadata or listed_metadata.get(sys_id)
+
+        return run_concurrently(delete, sys_ids, max_workers=max_workers)
+
+    def __open_upload(self, file, file_name: str, content_type: str):
+        """Returns (body, file_name, content_type, opened file to close)"""
+        opened = None
+        if isinstance(file, (str, os.PathLike)):
+            file_name = file_name or os.path.basename(file)
+            opened = file = open(file, mode="rb")
+        elif not file_name and hasattr(file, "name"):
+            file_name = os.path.basename(file.name)
+
+        if not file_name:
+            raise UploadAttachment("file_name is required when file has no name")
+
+        if not content_type:
+            content_type = (
+                mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+            )
+        if "\r" in content_type or "\n" in content_type:
+            if opened:
+                opened.close()
+            raise UploadAttachment("content_type must not contain line breaks")
+
+        return file, file_name, content_type, opened
+
+    def upload_file(
+        self,
+        table_name: str,
+        table_sys_id: str,
+        file,
+        file_name: str = None,
+        content_type: str = None,
+        encryption_context: str = None,
+    ):
+        """Uploads a file as a binary request body, the content is streamed and never fully loaded in memory.
+        Ref. link: https://docs.servicenow.com/bundle/quebec-application-development/page/integrate/inbound-rest/concept/c_AttachmentAPI.html#attachment-POST-file
+
+        Args:
+            table_name (str, mandatory): Name of the table to attach the file to.
+            table_sys_id (str, mandatory): Sys_id of the record to attach the file to.
+            file (str | file | bytes | iterator, mandatory): file path, binary file object, bytes or iterator of bytes chunks.
+            file_name (str, optional): Name to give the attachment. Mandatory when file has no name.
+            content_type (str, optional): Content type of the file, guessed from file_name if not defined.
+            encryption_context (str, optional): Sys_id of an encryption context record.
+
+        Returns:
+            dict: metadata of the attachment created.
+        """
+        body, file_name, content_type, opened = self.__open_upload(
+            file, file_name, content_type
+        )
+
+        params = {
+            "table_name": table_name,
+            "table_sys_id": table_sys_id,
+            "file_name": file_name,
+        }
+        if encryption_context:
+            params["encryption_context"] = encryption_context
+
+        try:
+            result = self.http_client.post(
+                path=f"{self.default_path}/file",
+                headers={"Content-Type": content_type},
+                params=params,
+                body=body,
+                priority=self.request_priority,
+            )
+        finally:
+            if opened:
+                opened.close()
+
+        data = result.json()
+        if result.status_code != 201:
+            raise UploadAttachment(data)
+
+        return data.get("result")
+
+    def upload_file_multipart(
+        self,
+        table_name: str,
+        table_sys_id: str,
+        file,
+        file_name: str = None,
+        content_type: str = None,
+        chunk_size: int = 1024 * 1024,
+    ):
+        """Uploads a file as a multipart form, the content is streamed in chunks and never fully loaded in memory.
+        Ref. link: https://docs.servicenow.com/bundle/quebec-application-development/page/integrate/inbound-rest/concept/c_AttachmentAPI.html#attachment-POST-upload
+
+        Args:
+            table_name (str, mandatory): Name of the table to attach the file to.
+            table_sys_id (str, mandatory): Sys_id of the record to attach the file to.
+            file (str | file | bytes | iterator, mandatory): file path, binary file object, bytes or iterator of bytes chunks.
+            file_name (str, optional): Name to give the attachment. Mandatory when file has no name.
+            content_type (str, optional): Content type of the file, guessed from file_name if not defined.
+            chunk_size (int, optional): Size of chunks read from file objects (default: 1MB).
+
+        Returns:
+            dict: metadata of the attachment created.
+        """
+        file, file_name, content_type, opened = self.__open_upload(
+            file, file_name, content_type
+        )
+
+        if isinstance(file, bytes):
+            chunks = [file]
+        elif hasattr(file, "read"):
+            chunks = _read_chunks(file, chunk_size)
+        else:
+            chunks = file
+
+        boundary = uuid.uuid4().hex
+        body = _multipart_body(
+            boundary=boundary,
+            fields={"table_name": table_name, "table_sys_id": table_sys_id},
+            file_name=file_name,
+            content_type=content_type,
+            chunks=chunks,
+        )
+
+        try:
+            result = self.http_client.post(
+                path=f"{self.default_path}/upload",
+                headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+                body=body,
+                priority=self.request_priority,
+            )
+        finally:
+            if opened:
+                opened.close()
+
+        data = result.json()
+        if result.status_code != 201:
+            raise UploadAttachment(data)
+
+        return data.get("result")
+
+    def upload_files(self, uploads, max_workers: int = 4) -> BulkResult:
+        """Uploads many files to many records, with at most max_workers uploads at the same time.
+        A failed upload does not stop the others.
+
+        Args:
+            uploads (iterable, mandatory): dicts with the upload_file arguments
+                (table_name, table_sys_id, file and optionally file_name, content_type, encryption_context).
+            max_workers (int, optional): Maximum number of concurrent uploads (default: 4).
+
+        Returns:
+            BulkResult: one BulkItemResult by upload, with the attachment metadata as result.
+        """
+        return run_concurrently(
+            lambda upload: self.upload_file(**upload),
+            uploads,
+            max_workers=max_workers,
+        )
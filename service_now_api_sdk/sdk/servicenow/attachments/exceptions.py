@@ -11,3 +11,7 @@ class RecordFilterException(ITSMException):
 
 class DeleteAttachment(ITSMException):
     pass
+
+
+class UploadAttachment(ITSMException):
+    pass
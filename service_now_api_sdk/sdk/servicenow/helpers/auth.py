@@ -0,0 +1,111 @@
+import threading
+import time
+
+from service_now_api_sdk.sdk.servicenow.helpers.exceptions import (
+    AuthenticationException,
+)
+
+
+class OAuthToken:
+    """OAuth2 access token cache, refreshed before it expires.
+    Uses the password grant when user and password are given, otherwise the client credentials grant.
+    Ref. link: https://docs.servicenow.com/bundle/quebec-platform-administration/page/administer/security/concept/c_OAuthApplications.html
+    """
+
+    token_path = "oauth_token.do"
+
+    def __init__(
+        self,
+        base_url: str,
+        client_id: str,
+        client_secret: str,
+        user: str = None,
+        password: str = None,
+        refresh_margin: int = 60,
+        timeout: int = 30,
+    ) -> None:
+        self.base_url = base_url
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.user = user
+        self.password = password
+        self.refresh_margin = refresh_margin
+        self.timeout = timeout
+        self.access_token: str = None
+        self.refresh_token: str = None
+        self.expires_at: float = 0
+        self.__lock = threading.Lock()
+
+    @property
+    def grant_type(self) -> str:
+        if self.user and self.password:
+            return "password"
+        return "client_credentials"
+
+    def is_valid(self) -> bool:
+        return bool(self.access_token) and (
+            time.monotonic() < self.expires_at - self.refresh_margin
+        )
+
+    def get(self) -> str:
+        """Returns a valid access token, requesting a new one only when the cached token is about to expire
+
+        Returns:
+            str: access token
+        """
+        if self.is_valid():
+            return self.access_token
+
+        with self.__lock:
+            if self.is_valid():
+                return self.access_token
+
+            data = None
+            if self.refresh_token:
+                try:
+                    data = self.__request_token(
+                        {
+                            "grant_type": "refresh_token",
+                            "refresh_token": self.refresh_token,
+                        }
+                    )
+                except AuthenticationException:
+                    self.refresh_token = None
+
+            if data is None:
+                payload = {"grant_type": self.grant_type}
+                if self.grant_type == "password":
+                    payload["username"] = self.user
+                    payload["password"] = self.password
+                data = self.__request_token(payload)
+
+            self.access_token = data["access_token"]
+            self.refresh_token = data.get("refresh_token", self.refresh_token)
+            self.expires_at = time.monotonic() + int(data.get("expires_in", 1800))
+
+            return self.access_token
+
+    def invalidate(self):
+        """Discard the cached access token, e.g. after the server rejects it"""
+        with self.__lock:
+            self.access_token = None
+            self.expires_at = 0
+
+    def __request_token(self, payload: dict) -> dict:
+        import requests
+
+        result = requests.post(
+            url=f"{self.base_url}/{self.token_path}",
+            data={
+                **payload,
+                "client_id": self.client_id,
+                "client_secret": self.client_secret,
+            },
+            headers={"Accept": "application/json"},
+            timeout=self.timeout,
+        )
+
+        if result.status_code != 200:
+            raise AuthenticationException(result.text)
+
+        return result.json()
@@ -0,0 +1,144 @@
+import hashlib
+import hmac
+import json
+import os
+import pickle
+import tempfile
+import zlib
+from bisect import bisect_right
+
+
+class SpillBuffer:
+    """List-like container of records that keeps memory bounded by moving the oldest pages
+    to a compressed temporary file once the in-memory pages exceed max_memory_bytes.
+    Supports len(), iteration and indexed access (int or slice), spilled pages are read back on demand.
+    Spilled pages are pickled (so native values, see Records.coerce_types, are read back unchanged) and
+    zlib-compressed. The file is private to the process: created with mode 0600 and unlinked at once where the
+    platform allows it, and each page is authenticated with a key that never leaves the process, so a page
+    changed by anyone else is rejected instead of unpickled.
+
+    Args:
+        max_memory_bytes (int): approximate size of records (as JSON) kept in memory (default: 64MB).
+        directory (str, optional): directory of the temporary file, defaults to the system temp directory.
+        compress_level (int): zlib compression level of spilled pages (default: 1, fastest).
+    """
+
+    def __init__(
+        self,
+        max_memory_bytes: int = 64 * 1024 * 1024,
+        directory: str = None,
+        compress_level: int = 1,
+    ) -> None:
+        self.max_memory_bytes = max_memory_bytes
+        self.directory = directory
+        self.compress_level = compress_level
+        self.memory_bytes = 0
+        self.__file = None
+        self.__key = os.urandom(32)
+        self.__spilled = []  # (file offset, compressed size, rows count, digest)
+        self.__spilled_starts = []  # index of the first row of each spilled page
+        self.__spilled_rows = 0
+        self.__pages = []  # (rows, size) still in memory
+        self.__cached_page = (None, None)
+
+    def __len__(self) -> int:
+        return self.__spilled_rows + sum(len(rows) for rows, _ in self.__pages)
+
+    def __iter__(self):
+        for position in range(len(self.__spilled)):
+            yield from self.__read_spilled(position)
+        for rows, _ in list(self.__pages):
+            yield from rows
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        length = len(self)
+        if index < 0:
+            index += length
+        if index < 0 or index >= length:
+            raise IndexError("SpillBuffer index out of range")
+
+        if index < self.__spilled_rows:
+            position = bisect_right(self.__spilled_starts, index) - 1
+            rows = self.__read_spilled(position)
+            return rows[index - self.__spilled_starts[position]]
+
+        index -= self.__spilled_rows
+        for rows, _ in self.__pages:
+            if index < len(rows):
+                return rows[index]
+            index -= len(rows)
+
+    def __repr__(self) -> str:
+        return f"<SpillBuffer rows={len(self)} spilled_pages={len(self.__spilled)}>"
+
+    @property
+    def spilled(self) -> bool:
+        return bool(self.__spilled)
+
+    def append(self, row: dict):
+        self.extend([row])
+
+    def extend(self, rows):
+        rows = list(rows)
+        if not rows:
+            return
+
+        size = sum(len(json.dumps(row, default=str)) for row in rows)
+        self.__pages.append((rows, size))
+        self.memory_bytes += size
+
+        while self.memory_bytes > self.max_memory_bytes and self.__pages:
+            self.__spill(*self.__pages.pop(0))
+
+    def clear(self):
+        self.close()
+        self.__init__(
+            max_memory_bytes=self.max_memory_bytes,
+            directory=self.directory,
+            compress_level=self.compress_level,
+        )
+
+    def close(self):
+        """Remove the temporary file"""
+        if self.__file:
+            self.__file.close()
+            self.__file = None
+
+    def __spill(self, rows: list, size: int):
+        if self.__file is None:
+            self.__file = tempfile.TemporaryFile(dir=self.directory)
+
+        # pickled, so rows with native values (see Records.coerce_types) are read back unchanged
+        content = zlib.compress(
+            pickle.dumps(rows, protocol=pickle.HIGHEST_PROTOCOL), self.compress_level
+        )
+        self.__file.seek(0, 2)
+        self.__spilled.append(
+            (self.__file.tell(), len(content), len(rows), self.__digest(content))
+        )
+        self.__spilled_starts.append(self.__spilled_rows)
+        self.__file.write(content)
+
+        self.__spilled_rows += len(rows)
+        self.memory_bytes -= size
+
+    def __digest(self, content: bytes) -> bytes:
+        return hmac.new(self.__key, content, hashlib.sha256).digest()
+
+    def __read_spilled(self, position: int) -> list:
+        cached_position, cached_rows = self.__cached_page
+        if cached_position == position:
+            return cached_rows
+
+        offset, length, _, digest = self.__spilled[position]
+        self.__file.seek(offset)
+        content = self.__file.read(length)
+        if not hmac.compare_digest(self.__digest(content), digest):
+            raise ValueError("SpillBuffer page was changed outside the process")
+        rows = pickle.loads(zlib.decompress(content))
+
+        self.__cached_page = (position, rows)
+        return rows
@@ -0,0 +1,78 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, List
+
+
+@dataclass
+class BulkItemResult:
+    """Result of one item of a bulk operation
+
+    Attributes:
+        item: the input item.
+        result: value returned for the item, when it succeeded.
+        error (Exception): exception raised for the item, when it failed.
+    """
+
+    item: Any
+    result: Any = None
+    error: Exception = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class BulkResult:
+    """Results of a bulk operation, in the same order as the input items"""
+
+    items: List[BulkItemResult] = field(default_factory=list)
+
+    @property
+    def succeeded(self) -> List[BulkItemResult]:
+        return [item for item in self.items if item.ok]
+
+    @property
+    def failed(self) -> List[BulkItemResult]:
+        return [item for item in self.items if not item.ok]
+
+    def summary(self) -> dict:
+        failed = len(self.failed)
+        return {
+            "total": len(self.items),
+            "succeeded": len(self.items) - failed,
+            "failed": failed,
+        }
+
+
+def run_concurrently(
+    func: Callable, items: Iterable, max_workers: int = 4
+) -> BulkResult:
+    """Calls func for each item with at most max_workers calls in flight.
+    Items are consumed lazily, an error of one item is gathered and does not stop the others.
+
+    Args:
+        func (callable): function called with each item.
+        items (iterable): items to process.
+        max_workers (int): maximum number of concurrent calls (default: 4).
+
+    Returns:
+        BulkResult: one BulkItemResult by item, in the input order
+    """
+    results = {}
+
+    def call(index, item):
+        try:
+            results[index] = BulkItemResult(item=item, result=func(item))
+        except Exception as e:
+            results[index] = BulkItemResult(item=item, error=e)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = set()
+        for index, item in enumerate(items):
+            if len(in_flight) >= max_workers:
+                _, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            in_flight.add(executor.submit(call, index, item))
+        wait(in_flight)
+
+    return BulkResult(items=[results[index] for index in sorted(results)])
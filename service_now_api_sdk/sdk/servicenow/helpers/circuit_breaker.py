@@ -0,0 +1,66 @@
+import threading
+import time
+
+from service_now_api_sdk.sdk.servicenow.helpers.exceptions import CircuitOpenException
+
+
+class CircuitBreaker:
+    """Stops sending requests to an instance that is clearly degraded.
+    After failure_threshold consecutive failures (connection errors or failure_statuses), the circuit opens and
+    requests fail fast with CircuitOpenException for recovery_timeout seconds. Then one trial request is let through:
+    the circuit closes if it succeeds and opens again if it fails.
+
+    Args:
+        failure_threshold (int): consecutive failures that open the circuit (default: 5).
+        recovery_timeout (float): seconds before a trial request is let through (default: 30).
+        failure_statuses (tuple): HTTP status codes counted as failures (default: 429 and 5xx gateway errors).
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30,
+        failure_statuses: tuple = (429, 500, 502, 503, 504),
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.failure_statuses = failure_statuses
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at: float = None
+        self.__lock = threading.Lock()
+
+    def before_request(self):
+        """Raises CircuitOpenException when the request must not be sent"""
+        with self.__lock:
+            if self.state == self.CLOSED:
+                return
+
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at >= self.recovery_timeout:
+                    self.state = self.HALF_OPEN
+                    return
+
+            raise CircuitOpenException(
+                f"Circuit {self.state} after {self.failures} consecutive failures, retry later"
+            )
+
+    def is_failure(self, response) -> bool:
+        return response is None or response.status_code in self.failure_statuses
+
+    def record(self, response):
+        """Records the outcome of a request, response is None when the request raised an error"""
+        with self.__lock:
+            if not self.is_failure(response):
+                self.state = self.CLOSED
+                self.failures = 0
+                return
+
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
@@ -1,40 +1,266 @@
+import hashlib
 import json
+from contextlib import contextmanager
 from functools import wraps
 
-import requests
-
-from service_now_api_sdk.settings import (
-    SERVICENOW_API_PASSWORD,
-    SERVICENOW_API_TOKEN,
-    SERVICENOW_API_USER,
-    SERVICENOW_URL,
+from service_now_api_sdk import settings
+from service_now_api_sdk.sdk.servicenow.helpers.auth import OAuthToken
+from service_now_api_sdk.sdk.servicenow.helpers.circuit_breaker import CircuitBreaker
+from service_now_api_sdk.sdk.servicenow.helpers.hedging import RequestHedger
+from service_now_api_sdk.sdk.servicenow.helpers.rate_limit import RateLimiter
+from service_now_api_sdk.sdk.servicenow.helpers.scheduler import RequestScheduler
+from service_now_api_sdk.sdk.servicenow.helpers.single_flight import (
+    SingleFlight,
+    default_single_flight,
 )
+from service_now_api_sdk.settings import SERVICENOW_URL
 
 
 def headers_replace(f):
     @wraps(f)
-    def decorated_function(*args, **kwargs):
+    def decorated_function(self, *args, **kwargs):
         headers = {
             "Accept": "application/json",
             "Content-Type": "application/json",
         }
 
-        if SERVICENOW_API_TOKEN:
-            headers["Authorization"] = (f"Bearer {SERVICENOW_API_TOKEN}",)
+        token = self._get_token()
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
 
         if kwargs.get("headers"):
-            headers = {**headers, **kwargs.get["headers"]}
+            headers = {**headers, **kwargs.get("headers")}
 
         kwargs["headers"] = headers
 
-        return f(*args, **kwargs)
+        return f(self, *args, **kwargs)
 
     return decorated_function
 
 
 class Client:
+    """HTTP client of one ServiceNow instance. A client carries the instance URL, credentials,
+    connection pool, retries and rate budget, and can be shared by many API objects
+    (Records, Manager, Attachment, ProducerServiceCatalog...) to talk to several instances from one process.
+    Arguments not given are read from the environment variables (see settings).
+
+    Args:
+        url (str, optional): Instance base URL, e.g. https://instance.service-now.com.
+        token (str, optional): Static bearer token.
+        user (str, optional): User, for basic auth or OAuth password grant.
+        password (str, optional): Password, for basic auth or OAuth password grant.
+        client_id (str, optional): OAuth client id.
+        client_secret (str, optional): OAuth client secret.
+        pool_connections (int, optional): Number of connection pools to cache (default: 10).
+        pool_maxsize (int, optional): Maximum number of connections kept by pool (default: 10).
+        max_retries (int, optional): Retries of idempotent requests on connection errors
+            and 429/502/503/504 responses, with exponential backoff (default: 0).
+        rate_limit (float, optional): Maximum number of requests by second (default: unlimited).
+    """
+
     base_url = SERVICENOW_URL
     default_path = ""
+    session_cookie = "JSESSIONID"
+
+    def __init__(
+        self,
+        url: str = None,
+        token: str = None,
+        user: str = None,
+        password: str = None,
+        client_id: str = None,
+        client_secret: str = None,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        max_retries: int = 0,
+        rate_limit: float = None,
+    ) -> None:
+        if url:
+            self.base_url = url.rstrip("/")
+
+        # credentials given explicitly never mix with the ones of the environment
+        if not any([token, user, password, client_id, client_secret]):
+            token = settings.SERVICENOW_API_TOKEN
+            user = settings.SERVICENOW_API_USER
+            password = settings.SERVICENOW_API_PASSWORD
+            client_id = settings.SERVICENOW_CLIENT_ID
+            client_secret = settings.SERVICENOW_CLIENT_SECRET
+
+        self.token = token
+        self.user = user
+        self.password = password
+        self.client_id = client_id
+        self.pool_maxsize = pool_maxsize
+
+        # the HTTP stack is imported by the first client, not by the package import
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        # one session by client keeps the connection pool and the servicenow session cookie
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=Retry(
+                total=max_retries,
+                # without retries a read timeout is raised as ReadTimeout, not wrapped in a ConnectionError
+                read=max_retries or False,
+                backoff_factor=0.5,
+                status_forcelist=[429, 502, 503, 504],
+                raise_on_status=False,
+            ),
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.rate_limiter: RateLimiter = RateLimiter(rate_limit) if rate_limit else None
+        self.oauth = None
+        self.hedger: RequestHedger = None
+        self.circuit_breaker: CircuitBreaker = None
+        self.flights: SingleFlight = None
+        self.scheduler: RequestScheduler = None
+
+        if not token and client_id and client_secret:
+            self.oauth = OAuthToken(
+                base_url=self.base_url,
+                client_id=client_id,
+                client_secret=client_secret,
+                user=user,
+                password=password,
+            )
+
+    def share(self, client):
+        """Use the instance, credentials, connection pool and settings of another client
+
+        Args:
+            client (Client): client to share
+
+        Returns:
+            Client: Return self class
+        """
+        self.__dict__.update(client.__dict__)
+        return self
+
+    def hedge(self, percentile: float = 0.95, min_samples: int = 20):
+        """Send a duplicate of GET requests slower than the latency percentile of recent ones,
+        the first response wins (default: disabled)
+
+        Args:
+            percentile (float): Latency percentile after which the duplicate is sent (default: 0.95)
+            min_samples (int): Requests measured before hedging starts (default: 20)
+
+        Returns:
+            Client: Return self class
+        """
+        self.hedger = RequestHedger(
+            percentile=percentile,
+            min_samples=min_samples,
+            max_workers=self.pool_maxsize,
+        )
+        return self
+
+    def break_circuit(self, failure_threshold: int = 5, recovery_timeout: float = 30):
+        """Fail fast with CircuitOpenException after consecutive failures, instead of hammering a degraded instance (default: disabled)
+
+        Args:
+            failure_threshold (int): Consecutive failures that open the circuit (default: 5)
+            recovery_timeout (float): Seconds before a trial request is let through (default: 30)
+
+        Returns:
+            Client: Return self class
+        """
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=failure_threshold, recovery_timeout=recovery_timeout
+        )
+        return self
+
+    def single_flight(self, flights: SingleFlight = None):
+        """Coalesce concurrent identical GET requests (same instance, credentials, path, params and headers)
+        into one request, all callers receive its response (default: disabled)
+
+        Args:
+            flights (SingleFlight, optional): Group of coalesced requests (default: shared by all clients)
+
+        Returns:
+            Client: Return self class
+        """
+        self.flights = flights or default_single_flight
+        return self
+
+    def schedule(self, max_concurrency: int = None, limits: dict = None):
+        """Limit the requests in flight and let them through by priority class (interactive, default, bulk),
+        so latency-sensitive requests never wait behind bulk pagination. API objects tag their requests,
+        see their priority() method (default: disabled)
+
+        Args:
+            max_concurrency (int, optional): Maximum number of requests in flight (default: pool_maxsize)
+            limits (dict, optional): Maximum number of requests in flight by priority class,
+                e.g. {"bulk": 6} (default: bulk limited to 3/4 of max_concurrency)
+
+        Returns:
+            Client: Return self class
+        """
+        self.scheduler = RequestScheduler(
+            max_concurrency=max_concurrency or self.pool_maxsize, limits=limits
+        )
+        return self
+
+    def _credential_identity(self) -> str:
+        """Stable identity of the credentials of the client, requests of different credentials may see
+        different records (ACLs) so their responses are never shared"""
+        credential = json.dumps(
+            [self.base_url, self.token, self.user, self.client_id], default=str
+        )
+        return hashlib.sha256(credential.encode()).hexdigest()
+
+    def __session_identity(self, headers: dict) -> str:
+        # the token, password or session cookie actually sent by this request
+        session = json.dumps(
+            [
+                headers.get("Authorization"),
+                self.password,
+                self.session.cookies.get(self.session_cookie),
+            ],
+            default=str,
+        )
+        return hashlib.sha256(session.encode()).hexdigest()
+
+    def __flight_key(self, path: str, headers: dict, params: dict) -> str:
+        return json.dumps(
+            [
+                self.base_url,
+                self._credential_identity(),
+                self.__session_identity(headers),
+                path,
+                {k: v for k, v in headers.items() if k != "Authorization"},
+                params,
+            ],
+            sort_keys=True,
+            default=str,
+        )
+
+    def _get_token(self) -> str:
+        if self.token:
+            return self.token
+
+        if self.oauth:
+            return self.oauth.get()
+
+        return None
+
+    def _uses_basic_auth(self) -> bool:
+        return bool(not self.token and not self.oauth and self.user and self.password)
+
+    def _get_auth(self) -> tuple:
+        if not self._uses_basic_auth():
+            return None
+
+        # once servicenow has given a session cookie, the credentials are not sent again
+        if self.session.cookies.get(self.session_cookie):
+            return None
+
+        return (self.user, self.password)
 
     @headers_replace
     def __http_request(
@@ -44,7 +270,10 @@ class Client:
         headers: dict = None,
         data=None,
         params: dict = None,
-        timeout: int = None
+        timeout: int = None,
+        body=None,
+        reauthenticate: bool = True,
+        priority: str = None,
     ):
         if data is None:
             data = {}
@@ -52,54 +281,150 @@ class Client:
         if params is None:
             params = {}
 
-        if SERVICENOW_API_TOKEN:
-            return requests.request(
-                method=method,
-                url=f"{self.base_url}/{path}",
-                headers=headers,
-                data=json.dumps(data),
-                params=params,
-                timeout=timeout
-            )
+        # a raw body (bytes, file object or iterator of bytes) is streamed as is
+        body_position = None
+        if body is not None and hasattr(body, "seek") and hasattr(body, "tell"):
+            body_position = body.tell()
+
+        auth = self._get_auth()
 
-        if SERVICENOW_API_USER and SERVICENOW_API_PASSWORD:
-            return requests.request(
+        def send():
+            import requests
+            from urllib3.exceptions import ReadTimeoutError
+
+            try:
+                return self.session.request(
+                    method=method,
+                    url=f"{self.base_url}/{path}",
+                    headers=headers,
+                    data=json.dumps(data) if body is None else body,
+                    params=params,
+                    auth=auth,
+                    timeout=timeout,
+                )
+            except requests.ConnectionError as e:
+                # retries exhausted on read timeouts are raised as the timeout they are
+                reason = getattr(e.args[0], "reason", None) if e.args else None
+                if isinstance(reason, ReadTimeoutError):
+                    raise requests.ReadTimeout(e, request=e.request) from e
+                raise
+
+        if self.circuit_breaker:
+            self.circuit_breaker.before_request()
+
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+
+        def send_get():
+            if self.hedger:
+                response = self.hedger.run(
+                    send, acquire=lambda: self.__hedge_slot(priority)
+                )
+            else:
+                response = send()
+            # read the body now, the response may be shared between threads
+            response.content
+            return response
+
+        try:
+            if method == "GET" and self.flights:
+                result = self.flights.do(
+                    self.__flight_key(path, headers, params), send_get
+                )
+            elif method == "GET":
+                result = send_get()
+            else:
+                result = send()
+        except Exception:
+            if self.circuit_breaker:
+                self.circuit_breaker.record(None)
+            raise
+
+        if self.circuit_breaker:
+            self.circuit_breaker.record(result)
+
+        session_auth = self._uses_basic_auth() and not auth
+        replayable = body is None or isinstance(body, (bytes, str)) or body_position is not None
+        if (
+            result.status_code == 401
+            and reauthenticate
+            and replayable
+            and (self.oauth or session_auth)
+        ):
+            # expired session cookie or revoked token: authenticate again once
+            self.session.cookies.clear()
+            if self.oauth:
+                self.oauth.invalidate()
+
+            if body_position is not None:
+                body.seek(body_position)
+
+            return self.__http_request(
                 method=method,
-                url=f"{self.base_url}/{path}",
-                headers=headers,
-                data=json.dumps(data),
+                path=path,
+                headers={
+                    key: value
+                    for key, value in headers.items()
+                    if key != "Authorization"
+                },
+                data=data,
                 params=params,
-                auth=(SERVICENOW_API_USER, SERVICENOW_API_PASSWORD),
-                timeout=timeout
+                timeout=timeout,
+                body=body,
+                reauthenticate=False,
+                priority=priority,
             )
 
+        return result
+
+    @contextmanager
+    def __hedge_slot(self, priority: str = None):
+        # a hedged duplicate is one more request in flight: it takes its own token and scheduler slot
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+
+        if self.scheduler is None:
+            yield
+            return
+
+        with self.scheduler.slot(priority):
+            yield
+
+    def __scheduled_request(self, priority: str = None, **kwargs):
+        if self.scheduler is None:
+            return self.__http_request(priority=priority, **kwargs)
+
+        # the slot is held by the outer call, so the retry after a 401 does not wait for another one
+        with self.scheduler.slot(priority):
+            return self.__http_request(priority=priority, **kwargs)
+
     def post(
-        self, path: str, headers: dict = None, data: dict = None, params: dict = None, timeout: int = None
+        self, path: str, headers: dict = None, data: dict = None, params: dict = None, timeout: int = None, body=None, priority: str = None
     ):
-        return self.__http_request(
-            method="POST", path=path, headers=headers, data=data, params=params, timeout=timeout
+        return self.__scheduled_request(
+            method="POST", path=path, headers=headers, data=data, params=params, timeout=timeout, body=body, priority=priority
         )
 
-    def get(self, path: str, headers: dict = None, params: dict = None, timeout: int = None):
-        return self.__http_request(
-            method="GET", path=path, headers=headers, params=params, timeout=timeout
+    def get(self, path: str, headers: dict = None, params: dict = None, timeout: int = None, priority: str = None):
+        return self.__scheduled_request(
+            method="GET", path=path, headers=headers, params=params, timeout=timeout, priority=priority
         )
 
     def put(
-        self, path: str, headers: dict = None, data: dict = None, params: dict = None, timeout: int = None
+        self, path: str, headers: dict = None, data: dict = None, params: dict = None, timeout: int = None, priority: str = None
     ):
-        return self.__http_request(
-            method="PUT", path=path, headers=headers, data=data, params=params, timeout=timeout
+        return self.__scheduled_request(
+            method="PUT", path=path, headers=headers, data=data, params=params, timeout=timeout, priority=priority
         )
 
     def patch(
-        self, path: str, headers: dict = None, data: dict = None, params: dict = None, timeout: int = None
+        self, path: str, headers: dict = None, data: dict = None, params: dict = None, timeout: int = None, priority: str = None
     ):
-        return self.__http_request(
-            method="PATCH", path=path, headers=headers, data=data, params=params, timeout=timeout
+        return self.__scheduled_request(
+            method="PATCH", path=path, headers=headers, data=data, params=params, timeout=timeout, priority=priority
         )
 
-    def delete(self, path: str, headers: dict = None, data: dict = None, timeout: int = None):
-        return self.__http_request(
-            method="DELETE", path=path, headers=headers, data=data, timeout=timeout
+    def delete(self, path: str, headers: dict = None, data: dict = None, timeout: int = None, priority: str = None):
+        return self.__scheduled_request(
+            method="DELETE", path=path, headers=headers, data=data, timeout=timeout, priority=priority
         )
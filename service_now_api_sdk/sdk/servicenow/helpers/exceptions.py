@@ -0,0 +1,9 @@
+from service_now_api_sdk.exceptions import ITSMException
+
+
+class AuthenticationException(ITSMException):
+    pass
+
+
+class CircuitOpenException(ITSMException):
+    pass
@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+
+
+class _Superseded(Exception):
+    """The duplicate got its turn after the first attempt had already succeeded"""
+
+
+class RequestHedger:
+    """Sends a duplicate of a request that takes longer than the given latency percentile
+    and returns the response of whichever attempt finishes first. Only for idempotent requests.
+
+    Args:
+        percentile (float): latency percentile of recent requests after which the duplicate is sent (default: 0.95).
+        min_samples (int): requests measured before hedging starts (default: 20).
+        window (int): number of recent latencies kept (default: 200).
+        max_workers (int): threads available to run attempts, the connection pool size of the client (default: 10).
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        min_samples: int = 20,
+        window: int = 200,
+        max_workers: int = 10,
+    ) -> None:
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.hedged_requests = 0
+        self.__latencies = deque(maxlen=window)
+        self.__lock = threading.Lock()
+        self.__executor = ThreadPoolExecutor(max_workers=max_workers)
+        # duplicates waiting for a scheduler slot must not hold the workers of first attempts
+        self.__duplicates = ThreadPoolExecutor(max_workers=max_workers)
+
+    def threshold(self) -> float:
+        """Seconds after which a duplicate is sent, None while there are not enough samples"""
+        with self.__lock:
+            if len(self.__latencies) < self.min_samples:
+                return None
+            latencies = sorted(self.__latencies)
+        index = min(int(len(latencies) * self.percentile), len(latencies) - 1)
+        return latencies[index]
+
+    def __timed(self, send, started: threading.Event = None):
+        started_at = time.monotonic()
+        if started is not None:
+            started.set()
+        response = send()
+        with self.__lock:
+            self.__latencies.append(time.monotonic() - started_at)
+        return response
+
+    def run(self, send, acquire=None):
+        """Calls send, and a second time if the first call is slower than the threshold
+
+        Args:
+            send (callable): function sending the request and returning the response.
+            acquire (callable, optional): returns a context manager held while the duplicate is sent,
+                e.g. to take its own rate limit token and scheduler slot.
+
+        Returns:
+            response of the first attempt to finish successfully
+        """
+        threshold = self.threshold()
+        if threshold is None:
+            return self.__timed(send)
+
+        # the threshold counts from the start of the attempt, not from its time waiting for a worker
+        started = threading.Event()
+        first = self.__executor.submit(self.__timed, send, started)
+        started.wait()
+        done, _ = wait([first], timeout=threshold)
+        if done:
+            return first.result()
+
+        def duplicate():
+            with acquire() if acquire else nullcontext():
+                if first.done() and first.exception() is None:
+                    raise _Superseded()
+                return self.__timed(send)
+
+        with self.__lock:
+            self.hedged_requests += 1
+        attempts = {first, self.__duplicates.submit(duplicate)}
+
+        error = None
+        while attempts:
+            done, attempts = wait(attempts, return_when=FIRST_COMPLETED)
+            for attempt in done:
+                if attempt.exception() is None:
+                    return attempt.result()
+                error = attempt.exception()
+        raise error
@@ -0,0 +1,60 @@
+import json
+import sqlite3
+import threading
+import time
+
+
+class IdempotencyJournal:
+    """Records the outcome of operations by idempotency key, so that retrying a batch
+    does not run again an operation that already succeeded.
+    Keys are marked pending before the operation and done with its result after it, a key left pending
+    means the outcome of the operation is unknown (e.g. the process crashed while waiting for the response).
+
+    Args:
+        path (str): SQLite file shared by runs, ":memory:" keeps the journal only for this instance (default).
+    """
+
+    def __init__(self, path: str = ":memory:") -> None:
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self.__lock, self.__connection:
+            self.__connection.execute(
+                "CREATE TABLE IF NOT EXISTS journal ("
+                "key TEXT PRIMARY KEY, state TEXT NOT NULL, result TEXT, updated_at REAL NOT NULL)"
+            )
+
+    def begin(self, key: str) -> tuple:
+        """Marks a key as pending, if it is not in the journal yet
+
+        Returns:
+            tuple: (state, result) already recorded for the key, (None, None) if the key is new.
+        """
+        with self.__lock, self.__connection:
+            row = self.__connection.execute(
+                "SELECT state, result FROM journal WHERE key = ?", (key,)
+            ).fetchone()
+            if row:
+                state, result = row
+                return state, json.loads(result) if result else None
+
+            self.__connection.execute(
+                "INSERT INTO journal (key, state, updated_at) VALUES (?, 'pending', ?)",
+                (key, time.time()),
+            )
+            return None, None
+
+    def done(self, key: str, result):
+        with self.__lock, self.__connection:
+            self.__connection.execute(
+                "UPDATE journal SET state = 'done', result = ?, updated_at = ? WHERE key = ?",
+                (json.dumps(result), time.time(), key),
+            )
+
+    def discard(self, key: str):
+        """Removes a key, e.g. when the operation failed before reaching the server"""
+        with self.__lock, self.__connection:
+            self.__connection.execute("DELETE FROM journal WHERE key = ?", (key,))
+
+    def close(self):
+        self.__connection.close()
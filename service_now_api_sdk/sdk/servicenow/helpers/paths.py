@@ -0,0 +1,28 @@
+import getpass
+import os
+import tempfile
+
+
+def private_directory(directory: str = None, name: str = "cache") -> str:
+    """Creates a directory only accessible by its owner (mode 0700) and returns its path.
+    The default directory is name in the directory of the user in the system temp directory, so another
+    local user can neither read it nor pre-create it (changing the mode of a directory of another user fails).
+
+    Args:
+        directory (str, optional): directory to create (default: directory of the user in the system temp directory).
+        name (str): name of the default directory (default: cache).
+
+    Returns:
+        str: path of directory
+    """
+    if directory is None:
+        parent = os.path.join(
+            tempfile.gettempdir(), f"service_now_api_sdk-{getpass.getuser()}"
+        )
+        os.makedirs(parent, mode=0o700, exist_ok=True)
+        os.chmod(parent, 0o700)
+        directory = os.path.join(parent, name)
+
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    os.chmod(directory, 0o700)
+    return directory
@@ -0,0 +1,101 @@
+import queue
+import threading
+import weakref
+
+
+class PagePrefetcher:
+    """Fetches the next pages in a background thread while the caller processes the current one.
+    Call close() (or use it as a context manager) when the pages are no longer needed.
+
+    Args:
+        fetch (callable): function that receives a cursor and returns a tuple (rows, next_cursor, total),
+            next_cursor must be None on the last page.
+        cursor: cursor of the first page to fetch.
+        depth (int): maximum number of pages fetched ahead of the caller.
+    """
+
+    def __init__(self, fetch, cursor=None, depth: int = 1) -> None:
+        # the thread keeps a weak reference to the owner of a bound method, so an abandoned owner
+        # can still be collected and close the prefetcher
+        if hasattr(fetch, "__self__"):
+            self.__fetch = weakref.WeakMethod(fetch)
+        else:
+            self.__fetch = lambda: fetch
+        self.cursor = cursor
+        self.finished = False
+        self.__pages = queue.Queue(maxsize=max(depth, 1))
+        self.__stop = threading.Event()
+        self.__thread = threading.Thread(target=self.__run, args=(cursor,), daemon=True)
+        self.__thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __run(self, cursor):
+        while not self.__stop.is_set():
+            fetch = self.__fetch()
+            if fetch is None:
+                return
+
+            try:
+                page = fetch(cursor)
+            except Exception as e:
+                self.__put((None, e))
+                return
+            finally:
+                del fetch
+
+            self.__put((page, None))
+            cursor = page[1]
+            if cursor is None:
+                return
+
+    def __put(self, item):
+        while not self.__stop.is_set():
+            try:
+                self.__pages.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.finished:
+            raise StopIteration
+
+        page, error = self.__pages.get()
+        if error is not None:
+            self.finished = True
+            raise error
+
+        self.cursor = page[1]
+        self.finished = self.cursor is None
+        return page
+
+    def close(self, timeout: float = None):
+        """Stops fetching pages ahead, pages already fetched are discarded
+
+        Args:
+            timeout (float, optional): seconds to wait for the background thread to stop (default: do not wait),
+                a request in progress finishes first.
+        """
+        self.finished = True
+        self.__stop.set()
+        while True:
+            try:
+                self.__pages.get_nowait()
+            except queue.Empty:
+                break
+
+        if timeout is not None and self.__thread is not threading.current_thread():
+            self.__thread.join(timeout)
+
+    @property
+    def alive(self) -> bool:
+        """True while the background thread is running"""
+        return self.__thread.is_alive()
@@ -1,8 +1,6 @@
-import inspect
+import sys
 from datetime import timezone
 
-import six
-
 from service_now_api_sdk.sdk.servicenow.table.exceptions import (
     QueryEmpty,
     QueryExpressionError,
@@ -33,14 +31,14 @@ class QueryBuilder(object):
         """Sets ordering of field descending"""
 
         self._query.append("ORDERBYDESC{0}".format(self.current_field))
-        self.c_oper = inspect.currentframe().f_back.f_code.co_name
+        self.c_oper = sys._getframe().f_back.f_code.co_name
         return self
 
     def order_ascending(self):
         """Sets ordering of field ascending"""
 
         self._query.append("ORDERBY{0}".format(self.current_field))
-        self.c_oper = inspect.currentframe().f_back.f_code.co_name
+        self.c_oper = sys._getframe().f_back.f_code.co_name
         return self
 
     def starts_with(self, starts_with):
@@ -88,7 +86,7 @@ class QueryBuilder(object):
             - QueryTypeError: if `data` is of an unexpected type
         """
 
-        if isinstance(data, six.string_types):
+        if isinstance(data, str):
             return self._add_condition("=", data, types=[int, str])
         elif isinstance(data, list):
             return self._add_condition("IN", ",".join(map(str, data)), types=[str])
@@ -104,7 +102,7 @@ class QueryBuilder(object):
             - QueryTypeError: if `data` is of an unexpected type
         """
 
-        if isinstance(data, six.string_types):
+        if isinstance(data, str):
             return self._add_condition("!=", data, types=[int, str])
         elif isinstance(data, list):
             return self._add_condition("NOT IN", ",".join(data), types=[str])
@@ -122,7 +120,7 @@ class QueryBuilder(object):
 
         if hasattr(greater_than, "strftime"):
             greater_than = datetime_as_utc(greater_than).strftime("%Y-%m-%d %H:%M:%S")
-        elif isinstance(greater_than, six.string_types):
+        elif isinstance(greater_than, str):
             raise QueryTypeError(
                 "Expected value of type `int` or instance of `datetime`, not %s"
                 % type(greater_than)
@@ -139,7 +137,7 @@ class QueryBuilder(object):
 
         if hasattr(greater_than, "strftime"):
             greater_than = datetime_as_utc(greater_than).strftime("%Y-%m-%d %H:%M:%S")
-        elif isinstance(greater_than, six.string_types):
+        elif isinstance(greater_than, str):
             raise QueryTypeError(
                 "Expected value of type `int` or instance of `datetime`, not %s"
                 % type(greater_than)
@@ -156,7 +154,7 @@ class QueryBuilder(object):
 
         if hasattr(less_than, "strftime"):
             less_than = datetime_as_utc(less_than).strftime("%Y-%m-%d %H:%M:%S")
-        elif isinstance(less_than, six.string_types):
+        elif isinstance(less_than, str):
             raise QueryTypeError(
                 "Expected value of type `int` or instance of `datetime`, not %s"
                 % type(less_than)
@@ -173,7 +171,7 @@ class QueryBuilder(object):
 
         if hasattr(less_than, "strftime"):
             less_than = datetime_as_utc(less_than).strftime("%Y-%m-%d %H:%M:%S")
-        elif isinstance(less_than, six.string_types):
+        elif isinstance(less_than, str):
             raise QueryTypeError(
                 "Expected value of type `int` or instance of `datetime`, not %s"
                 % type(less_than)
@@ -235,7 +233,7 @@ class QueryBuilder(object):
             raise QueryMissingField("Conditions requires a field()")
 
         elif not type(operand) in types:
-            caller = inspect.currentframe().f_back.f_code.co_name
+            caller = sys._getframe().f_back.f_code.co_name
             raise QueryTypeError(
                 "Invalid type passed to %s() , expected: %s" % (caller, types)
             )
@@ -243,7 +241,7 @@ class QueryBuilder(object):
         elif self.c_oper:
             raise QueryMultipleExpressions("Expected logical operator after expression")
 
-        self.c_oper = inspect.currentframe().f_back.f_code.co_name
+        self.c_oper = sys._getframe().f_back.f_code.co_name
 
         self._query.append(
             "%(current_field)s%(operator)s%(operand)s"
@@ -271,10 +269,21 @@ class QueryBuilder(object):
         self.current_field = None
         self.c_oper = None
 
-        self.l_oper = inspect.currentframe().f_back.f_code.co_name
+        self.l_oper = sys._getframe().f_back.f_code.co_name
         self._query.append(operator)
         return self
 
+    def compile(self):
+        """Compiles the query into a Python predicate and sort key, to filter and order records locally
+        :return:
+            - CompiledQuery
+        """
+        from service_now_api_sdk.sdk.servicenow.helpers.query_compiler import (
+            compile_query,
+        )
+
+        return compile_query(self)
+
     def __str__(self):
         """String representation of the query object
         :raise:
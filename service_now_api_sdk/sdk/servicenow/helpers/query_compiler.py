@@ -0,0 +1,156 @@
+from functools import cmp_to_key
+from typing import Callable, Iterable, List
+
+from service_now_api_sdk.sdk.servicenow.helpers.query_parser import (
+    Condition,
+    ParsedQuery,
+    parse_query,
+)
+from service_now_api_sdk.sdk.servicenow.helpers.query_values import (
+    NUMBER,
+    is_native_number,
+    order_key,
+    raw,
+    sort_key,
+    text,
+)
+from service_now_api_sdk.sdk.servicenow.table.exceptions import QueryExpressionError
+
+
+def _is_empty(value) -> bool:
+    return text(value) == ""
+
+
+def _equals_any(expected: list) -> Callable[[object], bool]:
+    """Equality as the server does it: text compared case-insensitively ("007" is not "7", "1.0" is not "1"),
+    only native numbers (see Records.coerce_types) are compared as numbers"""
+    texts = {text(item) for item in expected}
+    numbers = {float(item) for item in texts if NUMBER.match(item)}
+
+    def equals(value) -> bool:
+        if is_native_number(raw(value)):
+            return float(raw(value)) in numbers
+        return text(value) in texts
+
+    return equals
+
+
+def _compile_condition(condition: Condition) -> Callable[[dict], bool]:
+    field, operator, value = condition.field, condition.operator, condition.value
+
+    if operator in ("=", "!=", "IN", "NOT IN"):
+        equals = _equals_any(value if operator in ("IN", "NOT IN") else [value])
+        if operator in ("=", "IN"):
+            return lambda row: equals(row.get(field))
+        return lambda row: not equals(row.get(field))
+
+    if operator in ("STARTSWITH", "ENDSWITH", "LIKE", "NOT LIKE"):
+        expected = text(value)
+        if operator == "STARTSWITH":
+            return lambda row: text(row.get(field)).startswith(expected)
+        if operator == "ENDSWITH":
+            return lambda row: text(row.get(field)).endswith(expected)
+        if operator == "LIKE":
+            return lambda row: expected in text(row.get(field))
+        return lambda row: expected not in text(row.get(field))
+
+    if operator == "ISEMPTY":
+        return lambda row: _is_empty(row.get(field))
+
+    if operator == "ISNOTEMPTY":
+        return lambda row: not _is_empty(row.get(field))
+
+    if operator in (">", ">=", "<", "<="):
+        expected = sort_key(value)
+        compare = {
+            ">": lambda key: key > expected,
+            ">=": lambda key: key >= expected,
+            "<": lambda key: key < expected,
+            "<=": lambda key: key <= expected,
+        }[operator]
+        # empty values never match a comparison
+        return lambda row: not _is_empty(row.get(field)) and compare(
+            sort_key(row.get(field))
+        )
+
+    if operator == "BETWEEN":
+        start, end = sort_key(value[0]), sort_key(value[1])
+        return lambda row: not _is_empty(row.get(field)) and (
+            start <= sort_key(row.get(field)) <= end
+        )
+
+    raise QueryExpressionError(f"Operator {operator} is not supported")
+
+
+def _all(predicates: List[Callable]) -> Callable[[dict], bool]:
+    if len(predicates) == 1:
+        return predicates[0]
+    return lambda row: all(predicate(row) for predicate in predicates)
+
+
+def _any(predicates: List[Callable]) -> Callable[[dict], bool]:
+    if len(predicates) == 1:
+        return predicates[0]
+    return lambda row: any(predicate(row) for predicate in predicates)
+
+
+class CompiledQuery:
+    """Query compiled into a Python predicate and sort key, to filter and order records locally
+    with the same semantics of the server: equality compares text case-insensitively, range operators and ORDERBY
+    compare numbers as numbers, empty values never match comparisons and sort first.
+    Records may have raw values, reference or display_value "all" dicts, or native values (see Records.coerce_types).
+
+    Args:
+        parsed (ParsedQuery): parsed query.
+    """
+
+    def __init__(self, parsed: ParsedQuery) -> None:
+        self.parsed = parsed
+        queries = [
+            _all([_any([_compile_condition(c) for c in group]) for group in query])
+            for query in parsed.queries
+        ]
+        self.predicate: Callable[[dict], bool] = (
+            _any(queries) if queries else (lambda row: True)
+        )
+        self.sort_key = cmp_to_key(self.__compare) if parsed.order_by else None
+
+    def __compare(self, left: dict, right: dict) -> int:
+        for field, descending in self.parsed.order_by:
+            left_key = order_key(left.get(field))
+            right_key = order_key(right.get(field))
+            if left_key != right_key:
+                result = -1 if left_key < right_key else 1
+                return -result if descending else result
+        return 0
+
+    def __call__(self, row: dict) -> bool:
+        return self.predicate(row)
+
+    def filter(self, rows: Iterable[dict]):
+        """Yields the records matching the query, rows may be any iterable (e.g. a generator of pages)"""
+        return (row for row in rows if self.predicate(row))
+
+    def sort(self, rows: Iterable[dict]) -> List[dict]:
+        """Returns the records ordered by the ORDERBY fields of the query (input order when there is none)"""
+        rows = list(rows)
+        # one stable sort by field, from the last ORDERBY to the first, is faster than sorting with sort_key
+        for field, descending in reversed(self.parsed.order_by):
+            rows.sort(key=lambda row: order_key(row.get(field)), reverse=descending)
+        return rows
+
+    def apply(self, rows: Iterable[dict]) -> List[dict]:
+        """Returns the records matching the query, ordered by the ORDERBY fields of the query"""
+        return self.sort(self.filter(rows))
+
+
+def compile_query(query) -> CompiledQuery:
+    """Compiles a query into a Python predicate and sort key
+
+    Args:
+        query (QueryBuilder | str): query, as built by QueryBuilder or an encoded query.
+
+    Returns:
+        CompiledQuery: compiled query
+    """
+    return CompiledQuery(parse_query(query))
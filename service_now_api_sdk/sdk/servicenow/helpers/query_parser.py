@@ -0,0 +1,198 @@
+import re
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+from service_now_api_sdk.sdk.servicenow.table.exceptions import QueryExpressionError
+
+OPERATORS = (
+    "NOT LIKE",
+    "NOT IN",
+    "STARTSWITH",
+    "ENDSWITH",
+    "ISNOTEMPTY",
+    "ISEMPTY",
+    "BETWEEN",
+    "LIKE",
+    "IN",
+    "!=",
+    ">=",
+    "<=",
+    "=",
+    ">",
+    "<",
+)
+
+# operators of encoded queries that cannot be evaluated locally, recognized so their conditions
+# are rejected instead of being read as a shorter operator (e.g. INSTANCEOF as IN)
+UNSUPPORTED_OPERATORS = (
+    "INSTANCEOF",
+    "ANYTHING",
+    "EMPTYSTRING",
+    "SAMEAS",
+    "NSAMEAS",
+    "DYNAMIC",
+    "DATEPART",
+    "NOTON",
+    "ON",
+    "RELATIVEGT",
+    "RELATIVEGE",
+    "RELATIVELT",
+    "RELATIVELE",
+    "RELATIVEEE",
+    "MORETHAN",
+    "LESSTHAN",
+    "VALCHANGES",
+    "CHANGESFROM",
+    "CHANGESTO",
+    "GT_FIELD",
+    "LT_FIELD",
+    "GT_OR_EQUALS_FIELD",
+    "LT_OR_EQUALS_FIELD",
+)
+
+# field names are lower case, so the upper case operator that follows is never part of it;
+# the longest operators are tried first, so a longer operator is never read as its prefix
+_CONDITION = re.compile(
+    r"^([a-z0-9_.]+)(%s)(.*)$"
+    % "|".join(
+        re.escape(operator)
+        for operator in sorted(OPERATORS + UNSUPPORTED_OPERATORS, key=len, reverse=True)
+    ),
+    re.S,
+)
+# gs.dateGenerate('2020-01-01 00:00:00') or gs.dateGenerate('2020-01-01', '00:00:00' | 'start' | 'end')
+_DATE_GENERATE = re.compile(
+    r"""^javascript:gs\.dateGenerate\(\s*(['"])([^'"]*)\1\s*(?:,\s*(['"])([^'"]*)\3\s*)?\)$"""
+)
+_DATE_GENERATE_TIMES = {"start": "00:00:00", "end": "23:59:59"}
+_ESCAPED_CARET = "\x00"
+
+
+@dataclass(frozen=True)
+class Condition:
+    """One condition of an encoded query
+
+    Attributes:
+        field (str): field name.
+        operator (str): one of OPERATORS.
+        value: str, tuple of str for IN and NOT IN, (start, end) for BETWEEN and None for ISEMPTY and ISNOTEMPTY.
+    """
+
+    field: str
+    operator: str
+    value: object = None
+
+
+@dataclass
+class ParsedQuery:
+    """Encoded query as data. A record matches when it matches any of queries (joined by ^NQ),
+    it matches a query when it matches every group, and a group when it matches any of its conditions (joined by ^OR)
+
+    Attributes:
+        queries (list): list of queries, each one a list of groups of conditions.
+        order_by (list): (field, descending) in order of precedence.
+    """
+
+    queries: List[List[List[Condition]]] = field(default_factory=list)
+    order_by: List[Tuple[str, bool]] = field(default_factory=list)
+
+    @property
+    def conditions(self) -> List[Condition]:
+        return [
+            condition
+            for query in self.queries
+            for group in query
+            for condition in group
+        ]
+
+
+def _unescape(value: str) -> str:
+    return value.replace(_ESCAPED_CARET, "^")
+
+
+def _date_value(value: str) -> str:
+    match = _DATE_GENERATE.match(value)
+    if match is None:
+        if value.startswith("javascript:"):
+            raise QueryExpressionError(f"Dynamic value {value} is not supported")
+        return value
+
+    date, time = match.group(2), match.group(4)
+    if time is None:
+        return date
+    return f"{date} {_DATE_GENERATE_TIMES.get(time, time)}"
+
+
+def parse_condition(term: str) -> Condition:
+    """Parses one condition, e.g. "priorityIN1,2"
+
+    Args:
+        term (str): encoded condition.
+
+    Returns:
+        Condition: parsed condition
+    """
+    match = _CONDITION.match(term)
+    if match is None:
+        raise QueryExpressionError(f"Invalid condition: {_unescape(term)}")
+
+    field_name, operator, value = match.groups()
+    if operator in UNSUPPORTED_OPERATORS:
+        raise QueryExpressionError(
+            f"Operator {operator} is not supported: {_unescape(term)}"
+        )
+    value = _unescape(value)
+
+    if operator in ("IN", "NOT IN"):
+        value = tuple(value.split(",")) if value else ()
+    elif operator == "BETWEEN":
+        start, _, end = value.partition("@")
+        value = (_date_value(start), _date_value(end))
+    elif operator in ("ISEMPTY", "ISNOTEMPTY"):
+        value = None
+    else:
+        value = _date_value(value)
+
+    return Condition(field=field_name, operator=operator, value=value)
+
+
+def parse_query(query) -> ParsedQuery:
+    """Parses an encoded query, as built by QueryBuilder or copied from a list view
+    (conditions joined by ^, ^OR and ^NQ, ORDERBY and ORDERBYDESC)
+
+    Args:
+        query (QueryBuilder | str): query to parse, None or empty for no conditions.
+
+    Returns:
+        ParsedQuery: parsed query
+    """
+    if query is None:
+        return ParsedQuery()
+    if not isinstance(query, str):
+        query = str(query) if query._query else ""
+
+    parsed = ParsedQuery()
+    query = query.replace("^^", _ESCAPED_CARET)
+    for encoded in query.split("^NQ"):
+        groups = []
+        for term in encoded.split("^"):
+            if not term or term == "EQ":
+                continue
+
+            if term.startswith("ORDERBYDESC"):
+                parsed.order_by.append((term[len("ORDERBYDESC"):], True))
+            elif term.startswith("ORDERBY"):
+                parsed.order_by.append((term[len("ORDERBY"):], False))
+            elif term.startswith("OR"):
+                if not groups:
+                    raise QueryExpressionError(
+                        f"OR condition without a previous condition: {_unescape(term)}"
+                    )
+                groups[-1].append(parse_condition(term[len("OR"):]))
+            else:
+                groups.append([parse_condition(term)])
+
+        if groups:
+            parsed.queries.append(groups)
+
+    return parsed
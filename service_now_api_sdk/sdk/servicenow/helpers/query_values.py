@@ -0,0 +1,91 @@
+import math
+import re
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+
+# plain decimals only, float() also accepts "nan", "inf" and "1_000" which are text for the Table API
+NUMBER = re.compile(r"^[+-]?(?:\d+(?:\.\d*)?|\.\d+)$")
+
+# names of the SQLite collations comparing values as sort_key() and text() do, see register_collations()
+COLLATION = "SERVICENOW"
+TEXT_COLLATION = "SERVICENOW_TEXT"
+
+
+def raw(value):
+    """Returns the value of reference fields (with link) and display_value "all" fields, which are dicts"""
+    if isinstance(value, dict):
+        return value.get("value")
+    return value
+
+
+def is_native_number(value) -> bool:
+    """True for finite int, float and Decimal values, e.g. coerced by Records.coerce_types"""
+    return (
+        isinstance(value, (int, float, Decimal))
+        and not isinstance(value, bool)
+        and math.isfinite(value)
+    )
+
+
+def text(value) -> str:
+    """Returns the value as the Table API would return it, lower cased"""
+    if type(value) is str:
+        return value.lower()
+    value = raw(value)
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return (datetime(1970, 1, 1) + value).strftime("%Y-%m-%d %H:%M:%S")
+    return str(value).lower()
+
+
+def sort_key(value) -> tuple:
+    """Key of range comparisons: empty values first, then numbers compared as numbers
+    and anything else as case-insensitive text"""
+    if is_native_number(raw(value)):
+        # native numbers may print in exponent notation
+        return (0, float(raw(value)), "")
+    value_text = text(value)
+    if value_text == "":
+        return (-1, 0, "")
+    if NUMBER.match(value_text):
+        return (0, float(value_text), "")
+    return (1, 0, value_text)
+
+
+def order_key(value) -> tuple:
+    """Key of ORDERBY: sort_key(), then the text so that equal numbers ("1" and "1.0") have a stable order"""
+    return (sort_key(value), text(value))
+
+
+def _compare(left_key, right_key) -> int:
+    if left_key == right_key:
+        return 0
+    return -1 if left_key < right_key else 1
+
+
+def register_collations(connection):
+    """Registers on a SQLite connection the collations of mirrored values:
+    COLLATION orders as sort_key() and TEXT_COLLATION compares as text()
+
+    Args:
+        connection (sqlite3.Connection): connection.
+
+    Returns:
+        sqlite3.Connection: the same connection
+    """
+    connection.create_collation(
+        COLLATION, lambda left, right: _compare(sort_key(left), sort_key(right))
+    )
+    connection.create_collation(
+        TEXT_COLLATION, lambda left, right: _compare(text(left), text(right))
+    )
+    return connection
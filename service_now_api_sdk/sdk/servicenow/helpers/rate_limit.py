@@ -0,0 +1,35 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """Token bucket limiting the number of calls by second, shared between threads
+
+    Args:
+        rate (float): calls allowed by second.
+        burst (int, optional): calls allowed at once after an idle period (default: 1).
+    """
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.__tokens = float(self.burst)
+        self.__updated_at = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a call is allowed"""
+        while True:
+            with self.__lock:
+                now = time.monotonic()
+                self.__tokens = min(
+                    self.burst, self.__tokens + (now - self.__updated_at) * self.rate
+                )
+                self.__updated_at = now
+
+                if self.__tokens >= 1:
+                    self.__tokens -= 1
+                    return
+
+                wait = (1 - self.__tokens) / self.rate
+            time.sleep(wait)
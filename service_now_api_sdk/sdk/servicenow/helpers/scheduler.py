@@ -0,0 +1,107 @@
+import heapq
+import itertools
+import threading
+from contextlib import contextmanager
+
+INTERACTIVE = "interactive"
+DEFAULT = "default"
+BULK = "bulk"
+
+PRIORITIES = {INTERACTIVE: 0, DEFAULT: 1, BULK: 2}
+
+
+class RequestScheduler:
+    """Limits the requests in flight of a client and lets them through by priority class:
+    a free slot goes to the waiting request of the highest priority class (interactive, default, bulk)
+    that is below its own concurrency limit, and requests of the same class go through in arrival order.
+    Bulk requests are limited below max_concurrency by default, so there is always a free slot for
+    latency-sensitive requests.
+
+    Args:
+        max_concurrency (int): maximum number of requests in flight (default: 10).
+        limits (dict, optional): maximum number of requests in flight by priority class,
+            e.g. {"bulk": 6} (default: bulk limited to 3/4 of max_concurrency).
+    """
+
+    def __init__(self, max_concurrency: int = 10, limits: dict = None) -> None:
+        self.max_concurrency = max(max_concurrency, 1)
+        self.limits = {
+            INTERACTIVE: self.max_concurrency,
+            DEFAULT: self.max_concurrency,
+            BULK: max(1, self.max_concurrency - max(1, self.max_concurrency // 4)),
+        }
+        self.limits.update(limits or {})
+        self.__in_flight = {priority: 0 for priority in PRIORITIES}
+        self.__waiting = []  # heap of (priority rank, arrival, priority, event)
+        self.__arrivals = itertools.count()
+        self.__lock = threading.Lock()
+
+    def __total_in_flight(self) -> int:
+        return sum(self.__in_flight.values())
+
+    def __grant(self):
+        """Wakes waiting requests while there are free slots, must be called with the lock held"""
+        skipped = []
+        while self.__waiting and self.__total_in_flight() < self.max_concurrency:
+            waiter = heapq.heappop(self.__waiting)
+            _, _, priority, event = waiter
+            if self.__in_flight[priority] >= self.limits[priority]:
+                # its class is full, the next classes may still go through
+                skipped.append(waiter)
+                continue
+            self.__in_flight[priority] += 1
+            event.set()
+
+        for waiter in skipped:
+            heapq.heappush(self.__waiting, waiter)
+
+    def acquire(self, priority: str = DEFAULT):
+        """Blocks until the request may be sent
+
+        Args:
+            priority (str): interactive, default or bulk (default: default).
+        """
+        if priority not in PRIORITIES:
+            priority = DEFAULT
+
+        event = threading.Event()
+        with self.__lock:
+            heapq.heappush(
+                self.__waiting,
+                (PRIORITIES[priority], next(self.__arrivals), priority, event),
+            )
+            self.__grant()
+        event.wait()
+        return priority
+
+    def release(self, priority: str = DEFAULT):
+        """Frees the slot of a finished request"""
+        if priority not in PRIORITIES:
+            priority = DEFAULT
+
+        with self.__lock:
+            self.__in_flight[priority] -= 1
+            self.__grant()
+
+    @contextmanager
+    def slot(self, priority: str = DEFAULT):
+        """Holds a slot while the block runs"""
+        priority = self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    def stats(self) -> dict:
+        """Returns the number of requests in flight and waiting by priority class"""
+        with self.__lock:
+            waiting = {priority: 0 for priority in PRIORITIES}
+            for _, _, priority, _ in self.__waiting:
+                waiting[priority] += 1
+            return {
+                priority: {
+                    "in_flight": self.__in_flight[priority],
+                    "waiting": waiting[priority],
+                }
+                for priority in PRIORITIES
+            }
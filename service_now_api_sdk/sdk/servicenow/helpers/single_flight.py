@@ -0,0 +1,45 @@
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls: while a call for a key is in flight, other callers
+    with the same key wait for it and receive its result (or its exception) instead of calling again."""
+
+    def __init__(self) -> None:
+        self.__calls = {}
+        self.__lock = threading.Lock()
+
+    def do(self, key, func):
+        """Calls func, unless a call with the same key is already in flight
+
+        Args:
+            key (hashable): identity of the call.
+            func (callable): function to call.
+
+        Returns:
+            result of func, shared by all callers of the same flight
+        """
+        with self.__lock:
+            future = self.__calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self.__calls[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(func())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self.__lock:
+                del self.__calls[key]
+
+        return future.result()
+
+
+# shared by every client, identical GETs of different SDK objects are coalesced too
+default_single_flight = SingleFlight()
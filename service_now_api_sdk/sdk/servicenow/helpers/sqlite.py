@@ -0,0 +1,24 @@
+import sqlite3
+from contextlib import contextmanager
+
+
+@contextmanager
+def connect(path: str, timeout: float = 30, setup=None):
+    """Opens a SQLite connection for one transaction, committed (or rolled back on error) and closed on exit
+
+    Args:
+        path (str): database file.
+        timeout (float): seconds to wait for a lock held by another connection (default: 30).
+        setup (callable, optional): called with the connection before the transaction, e.g. to register collations.
+
+    Returns:
+        sqlite3.Connection: connection, only valid inside the with block
+    """
+    connection = sqlite3.connect(path, timeout=timeout)
+    try:
+        if setup:
+            setup(connection)
+        with connection:
+            yield connection
+    finally:
+        connection.close()
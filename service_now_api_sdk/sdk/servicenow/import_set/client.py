@@ -0,0 +1,314 @@
+from dataclasses import dataclass, field
+from itertools import islice
+from time import monotonic, sleep
+from typing import Dict, List
+
+from service_now_api_sdk.sdk.servicenow.helpers.bulk import run_concurrently
+from service_now_api_sdk.sdk.servicenow.helpers.client import Client
+from service_now_api_sdk.sdk.servicenow.helpers.query_values import text
+from service_now_api_sdk.sdk.servicenow.helpers.scheduler import BULK
+from service_now_api_sdk.sdk.servicenow.import_set.exceptions import (
+    ImportSetException,
+    ImportSetTimeoutException,
+)
+from service_now_api_sdk.sdk.servicenow.table.client import Records
+
+FINISHED_STATES = ("processed", "cancelled")
+
+RESULT_FIELDS = [
+    "sys_import_row",
+    "sys_import_state",
+    "sys_import_state_comment",
+    "sys_target_sys_id",
+    "sys_target_table",
+]
+
+
+def _chunks(rows, chunk_size: int):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _value(row: dict, name: str):
+    value = row.get(name)
+    if isinstance(value, dict):
+        return value.get("value")
+    return value
+
+
+@dataclass
+class ImportRowResult:
+    """Transform result of one row
+
+    Attributes:
+        row (dict): the input row.
+        state (str): inserted, updated, ignored, skipped or error (pending when the transform has not finished).
+        sys_id (str): sys_id of the target record.
+        table (str): target table.
+        message (str): transform message, e.g. the error of the row.
+        import_set (str): sys_id of the import set of the row.
+    """
+
+    row: dict
+    state: str = None
+    sys_id: str = None
+    table: str = None
+    message: str = None
+    import_set: str = None
+
+    @property
+    def ok(self) -> bool:
+        return self.state != "error"
+
+
+@dataclass
+class ImportSetResult:
+    """Transform results of a load, in the same order as the input rows"""
+
+    rows: List[ImportRowResult] = field(default_factory=list)
+    import_sets: List[str] = field(default_factory=list)
+
+    @property
+    def failed(self) -> List[ImportRowResult]:
+        return [row for row in self.rows if not row.ok]
+
+    def summary(self) -> Dict[str, int]:
+        """Returns the number of rows by state, plus the total"""
+        totals = {"total": len(self.rows)}
+        for row in self.rows:
+            totals[row.state] = totals.get(row.state, 0) + 1
+        return totals
+
+
+class BaseImportSetAPI:
+    request_priority = BULK
+
+    def __init__(self, staging_table: str, client: Client = None) -> None:
+        self.default_path = "api/now/import"
+        self.http_client = client or Client()
+        self.staging_table = staging_table
+
+    def priority(self, priority: str):
+        """Priority class of the requests when the client schedules them (see Client.schedule):
+        interactive, default or bulk
+
+        Args:
+            priority (str): interactive, default or bulk
+
+        Returns:
+            ImportSet: Return self class
+        """
+        self.request_priority = priority
+        return self
+
+
+class ImportSet(BaseImportSetAPI):
+    """Allows you to insert rows into an import set staging table, transformed into target tables
+    by the transform maps of the staging table
+    Ref. link: https://docs.servicenow.com/bundle/quebec-application-development/page/integrate/inbound-rest/concept/c_ImportSetAPI.html
+    """
+
+    def __init__(self, staging_table: str, client: Client = None):
+        super().__init__(staging_table=staging_table, client=client)
+        self.response_timeout: int = 300
+
+    def timeout(self, timeout: int):
+        """Time to get error on try request data (default: 300)
+
+        Args:
+            timeout (int): time to get error on try request data (default: 300)
+
+        Returns:
+            ImportSet: Return self class
+        """
+        self.response_timeout = timeout
+        return self
+
+    def insert(self, row: dict) -> dict:
+        """Inserts one row, transformed synchronously
+
+        Args:
+            row (dict): fields of staging table.
+
+        Returns:
+            dict: import set, staging table and transform results of row
+        """
+        result = self.http_client.post(
+            f"{self.default_path}/{self.staging_table}",
+            data=row,
+            timeout=self.response_timeout,
+            priority=self.request_priority,
+        )
+
+        data = result.json()
+        if result.status_code != 201:
+            raise ImportSetException(data)
+        return data
+
+    def insert_multiple(self, rows: list) -> dict:
+        """Inserts many rows in one request, transformed asynchronously
+
+        Args:
+            rows (list): dicts with the fields of staging table.
+
+        Returns:
+            dict: import_set_id and multi_import_set_id
+        """
+        result = self.http_client.post(
+            f"{self.default_path}/{self.staging_table}/insertMultiple",
+            data={"records": rows},
+            timeout=self.response_timeout,
+            priority=self.request_priority,
+        )
+
+        data = result.json()
+        if result.status_code not in (200, 201):
+            raise ImportSetException(data)
+        return data
+
+    def wait(self, import_set_id: str, poll_interval: float = 5, timeout: float = 3600):
+        """Waits until the transform of an import set has finished
+
+        Args:
+            import_set_id (str): sys_id of import set.
+            poll_interval (float): seconds between state checks (default: 5).
+            timeout (float): seconds before ImportSetTimeoutException is raised (default: 3600).
+
+        Returns:
+            str: final state of import set (processed or cancelled)
+        """
+        deadline = monotonic() + timeout
+        while True:
+            records = Records("sys_import_set", client=self.http_client)
+            records.only(["state"]).limit(1)
+            records.query.field("sys_id").equals(import_set_id)
+            rows = records.get().data
+
+            state = _value(rows[0], "state") if rows else None
+            if state in FINISHED_STATES:
+                return state
+
+            if monotonic() + poll_interval > deadline:
+                raise ImportSetTimeoutException(
+                    f"Import set {import_set_id} not finished after {timeout}s (state: {state})"
+                )
+            sleep(poll_interval)
+
+    def row_results(self, import_set_id: str, fields: list = None) -> List[dict]:
+        """Returns the transform result of each row of an import set, in insertion order
+
+        Args:
+            import_set_id (str): sys_id of import set.
+            fields (list, optional): staging table fields also returned, the rows are then read from the staging table.
+
+        Returns:
+            list: sys_import_set_row records (state, target record and message)
+        """
+        table = self.staging_table if fields else "sys_import_set_row"
+        records = Records(table, client=self.http_client)
+        records.only(
+            RESULT_FIELDS + [name for name in fields or [] if name not in RESULT_FIELDS]
+        ).exclude_reference_link(True).limit(1000)
+        records.query.field("sys_import_set").equals(import_set_id).AND().field(
+            "sys_import_row"
+        ).order_ascending()
+        return records.all()
+
+    def __fill_results(self, results: List[ImportRowResult], import_set_id: str):
+        """Matches the rows of a chunk to the staging rows of its import set by their field values,
+        a row without a matching staging row stays pending"""
+        names = sorted({name for result in results for name in result.row})
+
+        def key(row: dict) -> tuple:
+            return tuple(text(row.get(name)) for name in names)
+
+        # rows with the same values are matched in insertion order
+        staged = {}
+        for row_result in self.row_results(import_set_id, fields=names):
+            staged.setdefault(key(row_result), []).append(row_result)
+
+        for result in results:
+            matches = staged.get(key(result.row))
+            if not matches:
+                continue
+
+            row_result = matches.pop(0)
+            result.state = _value(row_result, "sys_import_state") or "pending"
+            result.sys_id = _value(row_result, "sys_target_sys_id") or None
+            result.table = _value(row_result, "sys_target_table") or None
+            result.message = _value(row_result, "sys_import_state_comment") or None
+
+    def load(
+        self,
+        rows,
+        chunk_size: int = 1000,
+        max_workers: int = 4,
+        wait: bool = True,
+        poll_interval: float = 5,
+        timeout: float = 3600,
+    ) -> ImportSetResult:
+        """Inserts rows of any iterable in chunks of chunk_size rows (one insertMultiple request by chunk),
+        with at most max_workers chunks in flight. Rows are consumed lazily, chunk by chunk.
+        A failed chunk does not stop the others, its rows are reported with error state.
+        Rows are matched to their staging rows by field values, a row without a match (e.g. a value truncated
+        by the staging table) is reported with pending state, as are the rows not transformed before timeout.
+
+        Args:
+            rows (iterable): dicts with the fields of staging table.
+            chunk_size (int): rows by request (default: 1000).
+            max_workers (int): maximum number of chunks in flight (default: 4).
+            wait (bool): wait the transform of each chunk and report the result of each row (default: true).
+            poll_interval (float): seconds between import set state checks (default: 5).
+            timeout (float): seconds to wait the transform of a chunk (default: 3600).
+
+        Returns:
+            ImportSetResult: one ImportRowResult by row, in the input order
+        """
+
+        def load_chunk(chunk):
+            response = self.insert_multiple(chunk)
+            import_set_id = response.get("import_set_id")
+            results = [
+                ImportRowResult(row=row, state="pending", import_set=import_set_id)
+                for row in chunk
+            ]
+            if not wait or not import_set_id:
+                return results
+
+            try:
+                self.wait(import_set_id, poll_interval=poll_interval, timeout=timeout)
+            except ImportSetTimeoutException as e:
+                # the rows are inserted: those already transformed are reported, the others stay pending
+                try:
+                    self.__fill_results(results, import_set_id)
+                except Exception:
+                    pass
+                for result in results:
+                    if result.state == "pending":
+                        result.message = str(e)
+                return results
+
+            self.__fill_results(results, import_set_id)
+            return results
+
+        bulk = run_concurrently(
+            load_chunk, _chunks(rows, chunk_size), max_workers=max_workers
+        )
+
+        result = ImportSetResult()
+        for item in bulk.items:
+            if item.ok:
+                result.rows.extend(item.result)
+                import_set_id = item.result[0].import_set if item.result else None
+                if import_set_id and import_set_id not in result.import_sets:
+                    result.import_sets.append(import_set_id)
+            else:
+                result.rows.extend(
+                    ImportRowResult(row=row, state="error", message=str(item.error))
+                    for row in item.item
+                )
+        return result
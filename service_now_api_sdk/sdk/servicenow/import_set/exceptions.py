@@ -0,0 +1,9 @@
+from service_now_api_sdk.exceptions import ITSMException
+
+
+class ImportSetException(ITSMException):
+    pass
+
+
+class ImportSetTimeoutException(ITSMException):
+    pass
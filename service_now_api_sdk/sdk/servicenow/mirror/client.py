@@ -0,0 +1,287 @@
+import json
+import time
+from typing import List
+
+from service_now_api_sdk.sdk.servicenow.helpers.client import Client
+from service_now_api_sdk.sdk.servicenow.helpers.query_parser import parse_query
+from service_now_api_sdk.sdk.servicenow.helpers.query_values import (
+    TEXT_COLLATION,
+    register_collations,
+)
+from service_now_api_sdk.sdk.servicenow.helpers.sqlite import connect
+from service_now_api_sdk.sdk.servicenow.mirror.exceptions import (
+    MirrorQueryException,
+    MirrorTableException,
+)
+from service_now_api_sdk.sdk.servicenow.mirror.sql import query_to_sql, quote
+from service_now_api_sdk.sdk.servicenow.table.client import Records
+
+SYNC_COLUMN = "_mirror_sync"
+
+
+def _after(keys: tuple, values: tuple) -> str:
+    """Encoded condition of the records ordered after values by keys, e.g.
+    sys_updated_on>2024-01-01 00:00:00^NQsys_updated_on=2024-01-01 00:00:00^sys_id>abc"""
+    queries = []
+    for i, key in enumerate(keys):
+        terms = [f"{name}={value}" for name, value in zip(keys[:i], values[:i])]
+        terms.append(f"{key}>{values[i]}")
+        queries.append("^".join(terms))
+    return "^NQ".join(queries)
+
+
+class Mirror:
+    """Local replica of tables in an indexed SQLite database, to run queries offline.
+    The first sync of a table loads all its records, the next ones only the records updated since
+    the last sync (sys_updated_on). Records deleted in the instance are removed by a full sync.
+    Queries have the value semantics of compiled queries (see helpers.query_values), the database uses
+    their SQLite collations: other connections writing to it must call register_collations().
+
+    Args:
+        database_path (str): SQLite database file, created if it does not exist.
+        client (Client, optional): http client of the instance.
+        page_size (int): records by page when syncing (default: 1000).
+    """
+
+    def __init__(
+        self, database_path: str, client: Client = None, page_size: int = 1000
+    ) -> None:
+        self.database_path = database_path
+        self.http_client = client or Client()
+        self.page_size = page_size
+
+        with self.__connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS _mirror_tables ("
+                "name TEXT PRIMARY KEY, fields TEXT NOT NULL, watermark TEXT, synced_at REAL)"
+            )
+
+    def __connect(self):
+        return connect(self.database_path, setup=register_collations)
+
+    def __table_info(self, connection, table: str):
+        return connection.execute(
+            "SELECT fields, watermark FROM _mirror_tables WHERE name = ?", (table,)
+        ).fetchone()
+
+    def tables(self) -> List[str]:
+        """Returns the mirrored tables"""
+        with self.__connect() as connection:
+            return [
+                name
+                for name, in connection.execute(
+                    "SELECT name FROM _mirror_tables ORDER BY name"
+                )
+            ]
+
+    def columns(self, table: str) -> List[str]:
+        """Returns the mirrored fields of table"""
+        with self.__connect() as connection:
+            info = self.__table_info(connection, table)
+        if info is None:
+            raise MirrorTableException(f"Table {table} is not mirrored")
+        return json.loads(info[0])
+
+    def add(self, table: str, fields: list, indexes: list = None):
+        """Adds a table to the mirror, or changes its fields and indexes (synced on the next full sync)
+
+        Args:
+            table (str): table name.
+            fields (list): fields to mirror, sys_id and sys_updated_on are always included.
+            indexes (list, optional): fields to index, each item is a field or a list of fields (composite index).
+
+        Returns:
+            Mirror: Return self class
+        """
+        fields = list(dict.fromkeys(["sys_id", "sys_updated_on", *fields]))
+
+        with self.__connect() as connection:
+            info = self.__table_info(connection, table)
+            if info is None:
+                columns = ", ".join(f"{quote(name)} TEXT" for name in fields[1:])
+                connection.execute(
+                    f"CREATE TABLE {quote(table)} ("
+                    f'"sys_id" TEXT PRIMARY KEY, {columns}, {quote(SYNC_COLUMN)} INTEGER)'
+                )
+            else:
+                current = json.loads(info[0])
+                for name in fields:
+                    if name not in current:
+                        connection.execute(
+                            f"ALTER TABLE {quote(table)} ADD COLUMN {quote(name)} TEXT"
+                        )
+
+            for index in [["sys_updated_on"], *(indexes or [])]:
+                index = [index] if isinstance(index, str) else list(index)
+                name = quote(f"{table}__{'__'.join(index)}")
+                columns = ", ".join(
+                    f"{quote(column)} COLLATE {TEXT_COLLATION}" for column in index
+                )
+                connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS {name} ON {quote(table)} ({columns})"
+                )
+
+            # new fields are only filled by a full sync, so the watermark is reset
+            watermark = None
+            if info and set(fields) <= set(json.loads(info[0])):
+                watermark = info[1]
+            connection.execute(
+                "INSERT OR REPLACE INTO _mirror_tables (name, fields, watermark, synced_at) "
+                "VALUES (?, ?, ?, (SELECT synced_at FROM _mirror_tables WHERE name = ?))",
+                (table, json.dumps(fields), watermark, table),
+            )
+        return self
+
+    def __spec(self, table: str, fields: list, keys: tuple):
+        records = Records(table, client=self.http_client)
+        records.only(fields).exclude_reference_link(True).limit(self.page_size)
+        records.query.field(keys[0]).order_ascending()
+        for key in keys[1:]:
+            records.query.AND().field(key).order_ascending()
+        return records.spec()
+
+    def __last_update(self, table: str) -> str:
+        records = Records(table, client=self.http_client)
+        records.only(["sys_updated_on"]).limit(1)
+        records.query.field("sys_updated_on").order_descending()
+        rows, _, _ = records._request_page()
+        return rows[0].get("sys_updated_on") if rows else None
+
+    def __scan(self, spec, keys: tuple, condition: str = None):
+        """Yields the pages of spec ordered by keys, each page requested after the last key of the previous one
+        (keyset pagination), so records updated during the scan do not shift the next pages as offsets would"""
+        last = None
+        while True:
+            page_spec = spec
+            if last is not None:
+                page_spec = spec.where(_after(keys, last))
+            elif condition:
+                page_spec = spec.where(condition)
+
+            rows, _, _ = page_spec.records()._request_page()
+            if rows:
+                key = tuple(rows[-1].get(name) or "" for name in keys)
+                if last is not None and key <= last:
+                    raise MirrorQueryException(
+                        f"Records of {spec.table} are not ordered by {', '.join(keys)}"
+                    )
+                last = key
+                yield rows
+            if len(rows) < self.page_size:
+                return
+
+    def sync(self, table: str, full: bool = False) -> int:
+        """Loads the records of table updated since the last sync, or all records on the first sync and when full is true.
+        A full sync also removes the records deleted in the instance.
+
+        Args:
+            table (str): mirrored table.
+            full (bool): True to load all records (default: false).
+
+        Returns:
+            int: number of records loaded
+        """
+        fields = self.columns(table)
+        with self.__connect() as connection:
+            watermark = self.__table_info(connection, table)[1]
+        full = full or watermark is None
+
+        if full:
+            # scanned by sys_id, which updates never change; changes made while the scan runs
+            # are after the last update seen before it, the next sync reads them again
+            watermark = self.__last_update(table)
+            pages = self.__scan(self.__spec(table, fields, ("sys_id",)), ("sys_id",))
+        else:
+            # >= so records updated in the same second as the watermark are not missed, writes are idempotent
+            keys = ("sys_updated_on", "sys_id")
+            pages = self.__scan(
+                self.__spec(table, fields, keys), keys, f"sys_updated_on>={watermark}"
+            )
+
+        sync_id = time.time_ns()
+        columns = ", ".join(quote(name) for name in [*fields, SYNC_COLUMN])
+        placeholders = ", ".join("?" for _ in range(len(fields) + 1))
+        insert = f"INSERT OR REPLACE INTO {quote(table)} ({columns}) VALUES ({placeholders})"
+
+        loaded = 0
+        for rows in pages:
+            values = [[row.get(name) for name in fields] + [sync_id] for row in rows]
+            with self.__connect() as connection:
+                connection.executemany(insert, values)
+            loaded += len(rows)
+            if not full:
+                watermark = max(
+                    [watermark or ""] + [row.get("sys_updated_on") or "" for row in rows]
+                )
+
+        # only reached when the scan got to its last page, an error before leaves every record in place
+        with self.__connect() as connection:
+            if full:
+                connection.execute(
+                    f"DELETE FROM {quote(table)} WHERE {quote(SYNC_COLUMN)} != ?",
+                    (sync_id,),
+                )
+            connection.execute(
+                "UPDATE _mirror_tables SET watermark = ?, synced_at = ? WHERE name = ?",
+                (watermark or None, time.time(), table),
+            )
+        return loaded
+
+    def sync_all(self, full: bool = False) -> dict:
+        """Syncs every mirrored table
+
+        Args:
+            full (bool): True to load all records (default: false).
+
+        Returns:
+            dict: number of records loaded by table
+        """
+        return {table: self.sync(table, full=full) for table in self.tables()}
+
+    def query(
+        self, table: str, query=None, fields: list = None, limit: int = None
+    ) -> List[dict]:
+        """Runs a query on the mirrored records of table
+
+        Args:
+            table (str): mirrored table.
+            query (QueryBuilder | str, optional): query, as built by QueryBuilder or an encoded query.
+            fields (list, optional): fields to return (default: all mirrored fields).
+            limit (int, optional): maximum number of records.
+
+        Returns:
+            list: records, with the same (string) values returned by the Table API
+        """
+        columns = self.columns(table)
+        fields = fields or columns
+        unknown = [name for name in fields if name not in columns]
+        if unknown:
+            raise MirrorQueryException(f"Fields {unknown} are not mirrored")
+        where, params, order_by = query_to_sql(parse_query(query), columns)
+
+        sql = f"SELECT {', '.join(quote(name) for name in fields)} FROM {quote(table)}"
+        if where:
+            sql += f" WHERE {where}"
+        if order_by:
+            sql += f" ORDER BY {order_by}"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self.__connect() as connection:
+            cursor = connection.execute(sql, params)
+            return [dict(zip(fields, row)) for row in cursor]
+
+    def records(self, records: Records, limit: int = None) -> List[dict]:
+        """Runs the query of a configured Records object (table, query and fields) on the mirror
+
+        Args:
+            records (Records): configured Records instance.
+            limit (int, optional): maximum number of records.
+
+        Returns:
+            list: records
+        """
+        fields = records.sysparm_fields.split(",") if records.sysparm_fields else None
+        return self.query(records.table, records.query, fields=fields, limit=limit)
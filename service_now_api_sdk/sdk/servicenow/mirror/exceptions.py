@@ -0,0 +1,9 @@
+from service_now_api_sdk.exceptions import ITSMException
+
+
+class MirrorTableException(ITSMException):
+    pass
+
+
+class MirrorQueryException(ITSMException):
+    pass
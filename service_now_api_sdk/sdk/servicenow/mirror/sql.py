@@ -0,0 +1,114 @@
+from typing import List, Tuple
+
+from service_now_api_sdk.sdk.servicenow.helpers.query_parser import (
+    Condition,
+    ParsedQuery,
+)
+from service_now_api_sdk.sdk.servicenow.helpers.query_values import (
+    COLLATION,
+    TEXT_COLLATION,
+)
+from service_now_api_sdk.sdk.servicenow.mirror.exceptions import MirrorQueryException
+
+
+def quote(name: str) -> str:
+    return '"%s"' % name.replace('"', '""')
+
+
+def _like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _compare(column: str, operator: str, value: str) -> Tuple[str, list]:
+    # mirrored values are stored as text, the collation compares numbers as numbers and
+    # anything else (e.g. "2024-01-31 10:00:00" date times) as case-insensitive text
+    return f"({column} != '' AND {column} {operator} ? COLLATE {COLLATION})", [value]
+
+
+def condition_to_sql(condition: Condition, columns: List[str]) -> Tuple[str, list]:
+    """Translates one condition into a SQL expression and its params, with the value semantics of
+    compiled queries (see helpers.query_values), the connection must have register_collations()
+
+    Args:
+        condition (Condition): parsed condition.
+        columns (list): columns of mirrored table.
+
+    Returns:
+        tuple: (SQL expression, params)
+    """
+    if condition.field not in columns:
+        raise MirrorQueryException(
+            f"Field {condition.field} is not mirrored (dot-walked fields are not supported)"
+        )
+
+    column = quote(condition.field)
+    operator, value = condition.operator, condition.value
+
+    if operator == "=":
+        return f"{column} = ? COLLATE {TEXT_COLLATION}", [value]
+    if operator == "!=":
+        return f"{column} != ? COLLATE {TEXT_COLLATION}", [value]
+    if operator in ("IN", "NOT IN"):
+        if not value:
+            return ("0", []) if operator == "IN" else ("1", [])
+        placeholders = ", ".join("?" for _ in value)
+        return f"{column} COLLATE {TEXT_COLLATION} {operator} ({placeholders})", list(
+            value
+        )
+    if operator == "STARTSWITH":
+        return f"{column} LIKE ? ESCAPE '\\'", [_like(value) + "%"]
+    if operator == "ENDSWITH":
+        return f"{column} LIKE ? ESCAPE '\\'", ["%" + _like(value)]
+    if operator == "LIKE":
+        return f"{column} LIKE ? ESCAPE '\\'", ["%" + _like(value) + "%"]
+    if operator == "NOT LIKE":
+        return f"{column} NOT LIKE ? ESCAPE '\\'", ["%" + _like(value) + "%"]
+    if operator == "ISEMPTY":
+        return f"({column} IS NULL OR {column} = '')", []
+    if operator == "ISNOTEMPTY":
+        return f"({column} IS NOT NULL AND {column} != '')", []
+    if operator in (">", ">=", "<", "<="):
+        return _compare(column, operator, value)
+    if operator == "BETWEEN":
+        start_sql, start_params = _compare(column, ">=", value[0])
+        end_sql, end_params = _compare(column, "<=", value[1])
+        return f"({start_sql} AND {end_sql})", start_params + end_params
+
+    raise MirrorQueryException(f"Operator {operator} is not supported")
+
+
+def query_to_sql(parsed: ParsedQuery, columns: List[str]) -> Tuple[str, list, str]:
+    """Translates a parsed query into a SQL where clause, its params and an order by clause
+
+    Args:
+        parsed (ParsedQuery): parsed query.
+        columns (list): columns of mirrored table.
+
+    Returns:
+        tuple: (where clause, params, order by clause), clauses are empty strings when not needed
+    """
+    params = []
+    queries = []
+    for query in parsed.queries:
+        groups = []
+        for group in query:
+            conditions = []
+            for condition in group:
+                sql, condition_params = condition_to_sql(condition, columns)
+                conditions.append(sql)
+                params.extend(condition_params)
+            groups.append("(" + " OR ".join(conditions) + ")")
+        queries.append("(" + " AND ".join(groups) + ")")
+
+    where = " OR ".join(queries)
+
+    orders = []
+    for field_name, descending in parsed.order_by:
+        if field_name not in columns:
+            raise MirrorQueryException(f"Field {field_name} is not mirrored")
+        # as order_key(): values first, then their text for a stable order of equal numbers
+        direction = " DESC" if descending else ""
+        orders.append(f"{quote(field_name)} COLLATE {COLLATION}{direction}")
+        orders.append(f"{quote(field_name)} COLLATE {TEXT_COLLATION}{direction}")
+
+    return where, params, ", ".join(orders)
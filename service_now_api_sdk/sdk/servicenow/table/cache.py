@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import time
+import zlib
+
+from service_now_api_sdk.sdk.servicenow.helpers.paths import private_directory
+from service_now_api_sdk.sdk.servicenow.helpers.sqlite import connect
+
+
+class QueryCache:
+    """On-disk cache of Table API pages, shared by every process using the same directory.
+    Pages are keyed by instance, credentials, table, query params and page cursor, stored as compressed JSON
+    in a SQLite database and expire after ttl seconds. Cached pages hold records, the directory is only
+    accessible by its owner and pages of other credentials are never returned.
+
+    Args:
+        directory (str, optional): cache directory (default: directory of the user in the system temp directory).
+        ttl (int): seconds a cached page is valid (default: 300).
+        max_bytes (int): maximum size of stored pages, least recently used are evicted first (default: 256MB).
+        compress_level (int): zlib compression level of pages (default: 6).
+    """
+
+    def __init__(
+        self,
+        directory: str = None,
+        ttl: int = 300,
+        max_bytes: int = 256 * 1024 * 1024,
+        compress_level: int = 6,
+    ) -> None:
+        self.directory = private_directory(directory, "query_cache")
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.compress_level = compress_level
+        # created before sqlite does, so the database (and its -wal and -shm files) are only readable by the owner
+        database_path = os.path.join(self.directory, "pages.sqlite")
+        os.close(os.open(database_path, os.O_CREAT | os.O_RDWR, 0o600))
+        os.chmod(database_path, 0o600)
+
+        with self.__connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "key TEXT PRIMARY KEY, table_name TEXT NOT NULL, created_at REAL NOT NULL, "
+                "last_access REAL NOT NULL, size_bytes INTEGER NOT NULL, content BLOB NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS pages_table_name ON pages (table_name)"
+            )
+
+    def __connect(self):
+        return connect(os.path.join(self.directory, "pages.sqlite"))
+
+    @staticmethod
+    def key(
+        base_url: str, table: str, params: dict, cursor=None, credential: str = None
+    ) -> str:
+        """Returns the cache key of a page
+
+        Args:
+            base_url (str): instance URL.
+            table (str): table name.
+            params (dict): query params, as returned by Records._get_params().
+            cursor (str | int, optional): page cursor, None for the first page.
+            credential (str, optional): identity of the credentials of the request (see Client._credential_identity).
+
+        Returns:
+            str: cache key
+        """
+        return hashlib.sha256(
+            json.dumps(
+                {
+                    "url": base_url,
+                    "credential": credential,
+                    "table": table,
+                    "params": params,
+                    "cursor": cursor,
+                },
+                sort_keys=True,
+                default=str,
+            ).encode("utf-8")
+        ).hexdigest()
+
+    def get(self, key: str):
+        """Returns the cached page of key, or None when it is missing or expired
+
+        Args:
+            key (str): cache key.
+
+        Returns:
+            tuple: (records of page, cursor of next page, total of records)
+        """
+        with self.__connect() as connection:
+            entry = connection.execute(
+                "SELECT created_at, content FROM pages WHERE key = ?", (key,)
+            ).fetchone()
+            if entry is None:
+                return None
+
+            created_at, content = entry
+            if time.time() - created_at > self.ttl:
+                connection.execute("DELETE FROM pages WHERE key = ?", (key,))
+                return None
+
+            connection.execute(
+                "UPDATE pages SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+
+        rows, next_cursor, total_registers = json.loads(zlib.decompress(content))
+        return rows, next_cursor, total_registers
+
+    def put(self, key: str, table: str, page: tuple):
+        """Stores a page
+
+        Args:
+            key (str): cache key.
+            table (str): table of page, used by invalidate().
+            page (tuple): (records of page, cursor of next page, total of records)
+        """
+        content = zlib.compress(
+            json.dumps(list(page)).encode("utf-8"), self.compress_level
+        )
+        now = time.time()
+        with self.__connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO pages "
+                "(key, table_name, created_at, last_access, size_bytes, content) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, table, now, now, len(content), content),
+            )
+
+        self.evict()
+
+    def evict(self):
+        """Removes expired pages, then the least recently used ones until the cache size is below max_bytes"""
+        with self.__connect() as connection:
+            connection.execute(
+                "DELETE FROM pages WHERE created_at < ?", (time.time() - self.ttl,)
+            )
+            entries = connection.execute(
+                "SELECT key, size_bytes FROM pages ORDER BY last_access DESC"
+            ).fetchall()
+
+            total_bytes = 0
+            for key, size_bytes in entries:
+                if total_bytes + size_bytes > self.max_bytes:
+                    connection.execute("DELETE FROM pages WHERE key = ?", (key,))
+                else:
+                    total_bytes += size_bytes
+
+    def invalidate(self, table: str = None):
+        """Removes the cached pages of table, or all cached pages when it is not given
+
+        Args:
+            table (str, optional): table name.
+        """
+        with self.__connect() as connection:
+            if table:
+                connection.execute("DELETE FROM pages WHERE table_name = ?", (table,))
+            else:
+                connection.execute("DELETE FROM pages")
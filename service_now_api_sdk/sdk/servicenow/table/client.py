@@ -1,19 +1,44 @@
-import os
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import Future
 from time import sleep
 
+from service_now_api_sdk.sdk.servicenow.helpers.buffer import SpillBuffer
+from service_now_api_sdk.sdk.servicenow.helpers.bulk import BulkResult, run_concurrently
 from service_now_api_sdk.sdk.servicenow.helpers.client import Client
+from service_now_api_sdk.sdk.servicenow.helpers.journal import IdempotencyJournal
+from service_now_api_sdk.sdk.servicenow.helpers.prefetch import PagePrefetcher
 from service_now_api_sdk.sdk.servicenow.helpers.query_builder import QueryBuilder
+from service_now_api_sdk.sdk.servicenow.helpers.rate_limit import RateLimiter
+from service_now_api_sdk.sdk.servicenow.helpers.scheduler import (
+    BULK,
+    DEFAULT,
+    INTERACTIVE,
+)
+from service_now_api_sdk.sdk.servicenow.table.cache import QueryCache
 from service_now_api_sdk.sdk.servicenow.table.exceptions import (
     ManagerRetriveException,
+    ProducerOutcomeUnknownException,
+    ProducerSubmitException,
     RecordFilterException,
     RecordRetriesException,
 )
+from service_now_api_sdk.sdk.servicenow.table.export import CheckpointedExport
+from service_now_api_sdk.sdk.servicenow.table.schema import TableSchema, TypeCoercer
+from service_now_api_sdk.sdk.servicenow.table.shards import ShardedExport
+from service_now_api_sdk.sdk.servicenow.table.spec import QuerySpec
+from service_now_api_sdk.sdk.servicenow.table.watch import ChangeFeed
+from service_now_api_sdk.sdk.servicenow.table.writer import BufferedWriter
 
 
 class BaseTableAPI:
-    def __init__(self, table: str) -> None:
+    request_priority = DEFAULT
+
+    def __init__(self, table: str, client: Client = None) -> None:
         self.default_path = "api/now/table"
-        self.http_client = Client()
+        self.http_client = client or Client()
         self.sysparm_display_value = False
         self.sysparm_exclude_reference_link = False
         self.sysparm_fields = None
@@ -81,6 +106,19 @@ class BaseTableAPI:
         self.sysparm_fields = ",".join(fields)
         return self
 
+    def priority(self, priority: str):
+        """Priority class of the requests when the client schedules them (see Client.schedule):
+        interactive, default or bulk
+
+        Args:
+            priority (str): interactive, default or bulk
+
+        Returns:
+            TableAPI: Return self class
+        """
+        self.request_priority = priority
+        return self
+
     def _get_params(self) -> dict:
         params = {}
 
@@ -109,8 +147,10 @@ class Records(BaseTableAPI):
     Ref. link: https://docs.servicenow.com/bundle/quebec-application-development/page/integrate/inbound-rest/concept/c_TableAPI.html
     """
 
-    def __init__(self, table: str):
-        super().__init__(table=table)
+    request_priority = BULK
+
+    def __init__(self, table: str, client: Client = None):
+        super().__init__(table=table, client=client)
         self.sysparm_limit: int = 500
         self.sysparm_offset: int = None
         self.sysparm_suppress_pagination_header: bool = False
@@ -122,6 +162,13 @@ class Records(BaseTableAPI):
         self.next_link_sequence_request: str = None
         self.data = []
         self.query = QueryBuilder()
+        self.prefetch_depth: int = 0
+        self.spill_max_memory_bytes: int = None
+        self.spill_directory: str = None
+        self.type_coercer: TypeCoercer = None
+        self.query_cache: QueryCache = None
+        self.__prefetcher: PagePrefetcher = None
+        self.__prefetcher_params: dict = None
 
     def suppress_pagination_header(self, supress: bool):
         """Supress pagination header (default: false)
@@ -183,17 +230,48 @@ class Records(BaseTableAPI):
         self.sysparm_no_count = no_count
         return self
 
-    def count(self, count: bool):
-        """Do not execute a select count(*) on table (default: false)
+    def count(self, count: bool = None):
+        """Returns the number of records matching the query without downloading them.
+        When count is given, sets the sysparm_count parameter instead (default: false)
 
         Args:
-            count (bool): True to execute a select count(*) on table (default: false)
+            count (bool, optional): True to execute a select count(*) on table (default: false)
 
         Returns:
-            TableAPI: Return self class
+            int: Number of records matching the query, if count is not given
+            TableAPI: Return self class, if count is given
         """
-        self.sysparm_count = count
-        return self
+        if count is not None:
+            self.sysparm_count = count
+            return self
+
+        params = self._get_params()
+        for param in [
+            "sysparm_offset",
+            "sysparm_no_count",
+            "sysparm_count",
+            "sysparm_suppress_pagination_header",
+            "sysparm_display_value",
+            "sysparm_view",
+        ]:
+            params.pop(param, None)
+
+        # one sys_id is the smallest page the Table API accepts, the total comes in the header
+        params["sysparm_limit"] = 1
+        params["sysparm_fields"] = "sys_id"
+        params["sysparm_exclude_reference_link"] = True
+
+        result = self.http_client.get(
+            f"{self.default_path}/{self.table}",
+            params=params,
+            timeout=self.response_timeout,
+            priority=self.request_priority,
+        )
+
+        if result.status_code != 200:
+            raise RecordFilterException(result.text)
+
+        return int(result.headers["X-Total-Count"])
 
     def timeout(self, timeout: int):
         """Time to get error on try request data (default: 300)
@@ -239,19 +317,23 @@ class Records(BaseTableAPI):
 
         return params
 
-    def __request_helper(self, next_link="", retries=5) -> str:
+    def __request_helper(self, next_link="", retries=5) -> tuple:
         try:
             result = None
             params = self._get_params()
             if next_link:
                 result = self.http_client.get(
-                    next_link, params=params, timeout=self.response_timeout
+                    next_link,
+                    params=params,
+                    timeout=self.response_timeout,
+                    priority=self.request_priority,
                 )
             else:
                 result = self.http_client.get(
                     f"{self.default_path}/{self.table}",
                     params=params,
                     timeout=self.response_timeout,
+                    priority=self.request_priority,
                 )
             if result.status_code != 200:
                 text = result.text
@@ -259,15 +341,15 @@ class Records(BaseTableAPI):
 
             if result.headers.get("content-type")[:16] == "application/json":
                 data = result.json()
-                self.data.extend(data.get("result"))
                 if result.links.get("next"):
                     next_link = (
                         result.links.get("next", {})
                         .get("url", "")
-                        .replace(f"{os.environ['SERVICENOW_URL']}/", "")
+                        .replace(f"{self.http_client.base_url}/", "")
                     )
-                    return next_link
-                return None
+                    return data.get("result"), next_link
+                return data.get("result"), None
+            return [], None
         except Exception as e:
             if retries > 0:
                 print("Error: " + str(e))
@@ -277,16 +359,19 @@ class Records(BaseTableAPI):
             else:
                 raise RecordRetriesException(e)
 
-    def __request_helper_without_next_link(self, retries=5) -> int:
+    def __request_helper_without_next_link(self, offset=0, retries=5) -> tuple:
         try:
             params = self._get_params()
-            if not self.sysparm_offset:
-                self.sysparm_offset = 0
+            params["sysparm_limit"] = self.sysparm_limit
+            params.pop("sysparm_offset", None)
+            if offset:
+                params["sysparm_offset"] = offset
 
             result = self.http_client.get(
                 path=f"{self.default_path}/{self.table}",
                 params=params,
                 timeout=self.response_timeout,
+                priority=self.request_priority,
             )
 
             if result.status_code != 200:
@@ -295,79 +380,361 @@ class Records(BaseTableAPI):
 
             total_registers = int(result.headers["X-Total-Count"])
             data = result.json()
-            self.data.extend(data.get("result"))
-            return total_registers
+            return data.get("result"), total_registers
 
         except Exception as e:
             if retries > 0:
                 print("Error: " + str(e))
                 print("Retry in 30s")
                 sleep(30)
-                return self.__request_helper_without_next_link(retries=retries - 1)
+                return self.__request_helper_without_next_link(
+                    offset=offset, retries=retries - 1
+                )
             else:
                 raise RecordRetriesException(e)
 
+    def _request_page(self, cursor=None) -> tuple:
+        """Requests one page of records, from the query cache when it is enabled.
+
+        Args:
+            cursor (str | int, optional): next link, or offset when the pagination header is suppressed.
+                None requests the first page.
+
+        Returns:
+            tuple: (records of page, cursor of next page or None on the last page, total of records or None)
+        """
+        if self.query_cache is None:
+            return self.__fetch_page(cursor)
+
+        params = self._get_params()
+        params.pop("sysparm_offset", None)
+        key = self.query_cache.key(
+            self.http_client.base_url,
+            self.table,
+            params,
+            cursor,
+            credential=self.http_client._credential_identity(),
+        )
+        page = self.query_cache.get(key)
+        if page is None:
+            page = self.__fetch_page(cursor)
+            self.query_cache.put(key, self.table, page)
+        return page
+
+    def __fetch_page(self, cursor=None) -> tuple:
+        if self.sysparm_suppress_pagination_header:
+            offset = cursor or 0
+            rows, total_registers = self.__request_helper_without_next_link(offset)
+            if offset + self.sysparm_limit < total_registers:
+                return rows, offset + self.sysparm_limit, total_registers
+            return rows, None, total_registers
+
+        rows, next_link = self.__request_helper(next_link=cursor)
+        return rows, next_link, None
+
+    def _current_cursor(self):
+        if self.sysparm_suppress_pagination_header:
+            return self.sysparm_offset
+        return self.next_link_sequence_request
+
+    def _pages(self, cursor=None):
+        """Yields every page from cursor until the last one, fetching ahead when prefetch is enabled"""
+        if self.prefetch_depth:
+            with PagePrefetcher(
+                self._request_page, cursor, self.prefetch_depth
+            ) as prefetcher:
+                yield from prefetcher
+            return
+
+        while True:
+            page = self._request_page(cursor)
+            yield page
+            cursor = page[1]
+            if cursor is None:
+                return
+
+    def prefetch(self, depth: int = 1):
+        """Fetch up to depth next pages in a background thread while the current page is processed (default: 0, disabled)
+
+        Args:
+            depth (int): Number of pages to fetch ahead
+
+        Returns:
+            TableAPI: Return self class
+        """
+        self.prefetch_depth = depth
+        self.__close_prefetcher()
+        return self
+
+    def spill(self, max_memory_bytes: int = 64 * 1024 * 1024, directory: str = None):
+        """Keep the records of all() in a buffer that moves pages to a compressed temporary file
+        past max_memory_bytes, it still supports len(), iteration and indexed access (default: disabled)
+
+        Args:
+            max_memory_bytes (int): Approximate size of records kept in memory (default: 64MB)
+            directory (str, optional): Directory of the temporary file (default: system temp directory)
+
+        Returns:
+            TableAPI: Return self class
+        """
+        self.spill_max_memory_bytes = max_memory_bytes
+        self.spill_directory = directory
+        return self
+
+    def cache(
+        self,
+        ttl: int = 300,
+        directory: str = None,
+        max_bytes: int = 256 * 1024 * 1024,
+    ):
+        """Keep the pages of this query in an on-disk cache shared by every process using the same directory,
+        a page requested again with the same credentials, table, params and cursor within ttl seconds is not requested
+        to the server (default: disabled). Use query_cache.invalidate(table) to discard the cached pages of a table.
+
+        Args:
+            ttl (int): Seconds a cached page is valid (default: 300)
+            directory (str, optional): Cache directory, only accessible by its owner (default: directory of the user in system temp directory)
+            max_bytes (int): Maximum size of cached pages, least recently used are evicted first (default: 256MB)
+
+        Returns:
+            TableAPI: Return self class
+        """
+        self.query_cache = QueryCache(
+            directory=directory, ttl=ttl, max_bytes=max_bytes
+        )
+        return self
+
+    def coerce_types(
+        self,
+        coerce: bool = True,
+        cache_directory: str = None,
+        ttl: int = 24 * 60 * 60,
+        process_threshold: int = 20000,
+    ):
+        """Convert the values of get() and all() records into native types (int, float, Decimal, bool,
+        datetime, date, time and timedelta) using the field types of sys_dictionary (default: false).
+        Field types are loaded once by table and cached on disk for ttl seconds.
+        Only raw values are converted, display values are kept as strings.
+
+        Args:
+            coerce (bool): True to convert the values
+            cache_directory (str, optional): Directory of cached field types, only accessible by its owner (default: directory of the user in the system temp directory)
+            ttl (int): Seconds before the field types are loaded again (default: 1 day)
+            process_threshold (int): Minimum records of a page to convert it on a process pool (default: 20000)
+
+        Returns:
+            TableAPI: Return self class
+        """
+        if self.type_coercer:
+            self.type_coercer.close()
+        self.type_coercer = None
+        if coerce:
+            self.type_coercer = TypeCoercer(
+                TableSchema(self.http_client, directory=cache_directory, ttl=ttl),
+                process_threshold=process_threshold,
+            )
+        return self
+
+    def _coerce(self, rows: list) -> list:
+        if self.type_coercer is None or self.sysparm_display_value in (True, "true"):
+            return rows
+        return self.type_coercer.coerce(self.table, rows)
+
+    def __close_prefetcher(self):
+        if self.__prefetcher:
+            self.__prefetcher.close()
+        self.__prefetcher = None
+        self.__prefetcher_params = None
+
+    def close(self):
+        """Stops the background thread fetching pages ahead for get(), the next call of get() starts a new one
+
+        Returns:
+            TableAPI: Return self class
+        """
+        self.__close_prefetcher()
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __del__(self):
+        if getattr(self, "_Records__prefetcher", None):
+            self.__prefetcher.close()
+
+    def __next_page(self) -> tuple:
+        cursor = self._current_cursor()
+        if not self.prefetch_depth:
+            return self._request_page(cursor)
+
+        # a cursor or query changed by the caller invalidates the pages fetched ahead
+        params = self._get_params()
+        params.pop("sysparm_offset", None)
+        if (
+            self.__prefetcher is None
+            or self.__prefetcher.cursor != cursor
+            or self.__prefetcher_params != params
+        ):
+            self.__close_prefetcher()
+            self.__prefetcher = PagePrefetcher(
+                self._request_page, cursor, self.prefetch_depth
+            )
+            self.__prefetcher_params = params
+
+        try:
+            page = next(self.__prefetcher)
+        except Exception:
+            self.__close_prefetcher()
+            raise
+
+        if self.__prefetcher.finished:
+            self.__close_prefetcher()
+        return page
+
     def get(self):
-        """[summary]
+        """Request the next page of records, stored in data attribute.
+        After the last page, the next call starts from the first page again.
 
         Returns:
-            [type]: [description]
+            TableAPI: Return self class
         """
         self.data = []
+        rows, next_cursor, total_registers = self.__next_page()
+        self.data.extend(self._coerce(rows))
         if self.sysparm_suppress_pagination_header:
-            self.total_registers_sequence_request = (
-                self.__request_helper_without_next_link()
-            )
-            if (
-                self.sysparm_offset + self.sysparm_limit
-                < self.total_registers_sequence_request
-            ):
-                self.sysparm_offset = self.sysparm_offset + self.sysparm_limit
-            else:
-                self.sysparm_offset = None
+            self.total_registers_sequence_request = total_registers
+            self.sysparm_offset = next_cursor
+            if next_cursor is None:
                 self.total_registers_sequence_request = 0
             return self
-        self.next_link_sequence_request = self.__request_helper(
-            self.next_link_sequence_request
-        )
+        self.next_link_sequence_request = next_cursor
         return self
 
     @property
     def next(self):
-        """[summary]
+        """Request the next page of records, see get()
 
         Returns:
-            [type]: [description]
+            TableAPI: Return self class
         """
         return self.get()
 
     def all(self):
-        """[summary]
+        """Request all pages of records
 
         Returns:
-            [type]: [description]
+            list: all records of query (SpillBuffer when spill is enabled)
         """
         self.data = []
+        if self.spill_max_memory_bytes is not None:
+            self.data = SpillBuffer(
+                max_memory_bytes=self.spill_max_memory_bytes,
+                directory=self.spill_directory,
+            )
+        cursor = None
         if self.sysparm_suppress_pagination_header:
-            while True:
-                total_registers = self.__request_helper_without_next_link()
-                if self.sysparm_offset + self.sysparm_limit < total_registers:
-                    self.sysparm_offset = self.sysparm_offset + self.sysparm_limit
-                else:
-                    self.sysparm_offset = None
-                    break
-            return self.data
+            cursor = self.sysparm_offset
 
-        else:
-            next_link = None
-            while True:
-                next_link = self.__request_helper(next_link=next_link)
-                if not next_link:
-                    break
-            return self.data
+        for rows, _, _ in self._pages(cursor):
+            self.data.extend(self._coerce(rows))
+
+        if self.sysparm_suppress_pagination_header:
+            self.sysparm_offset = None
+        return self.data
+
+    def export(self, file_path: str, checkpoint_path: str = None) -> int:
+        """Export all records to a NDJSON file, resuming from the last completed page
+        when a previous export of the same query has failed
+
+        Args:
+            file_path (str): NDJSON file to write the records, one by line.
+            checkpoint_path (str, optional): file to store the cursor of next page (default: file_path + ".checkpoint").
+
+        Returns:
+            int: number of records exported
+        """
+        return CheckpointedExport(
+            self, file_path=file_path, checkpoint_path=checkpoint_path
+        ).run()
+
+    def sharded_export(
+        self,
+        database_path: str,
+        directory: str,
+        lease_seconds: float = 300,
+        max_attempts: int = 5,
+    ) -> ShardedExport:
+        """Export of the query split into shards, run by many worker processes of one node or many.
+        Plan the shards with plan_sys_id() or plan_dates(), then call run() in every worker and merge() at the end.
+
+        Args:
+            database_path (str): SQLite database of shards shared by the workers.
+            directory (str): directory of the NDJSON files of shards.
+            lease_seconds (float): seconds a lease lasts without being renewed (default: 300).
+            max_attempts (int): leases of a shard before it is marked as failed (default: 5).
+
+        Returns:
+            ShardedExport: export of a snapshot of the query
+        """
+        return ShardedExport(
+            self.spec(),
+            database_path=database_path,
+            directory=directory,
+            lease_seconds=lease_seconds,
+            max_attempts=max_attempts,
+        )
+
+    def watch(
+        self,
+        since=None,
+        min_interval: float = 5,
+        max_interval: float = 300,
+        overlap: int = 0,
+        stop=None,
+    ):
+        """Yield the records of query created or updated from now (or since) on, as RecordChange objects.
+        The polling interval goes from min_interval, while there are changes, to max_interval, while the table is quiet.
+        Pages are only requested when the previous changes were consumed.
+
+        Args:
+            since (datetime | str, optional): sys_updated_on (UTC) to start from (default: last change of query).
+            min_interval (float): shortest seconds between polls (default: 5).
+            max_interval (float): longest seconds between polls (default: 300).
+            overlap (int): seconds re-read before the cursor, for changes committed late (default: 0).
+            stop (threading.Event, optional): ends the generator when set.
+
+        Returns:
+            generator: RecordChange with action (created or updated) and record
+        """
+        return iter(
+            ChangeFeed(
+                self,
+                since=since,
+                min_interval=min_interval,
+                max_interval=max_interval,
+                overlap=overlap,
+                stop=stop,
+            )
+        )
+
+    def spec(self) -> QuerySpec:
+        """Immutable snapshot of the current configuration (table, options and query), later changes of this
+        object do not change it. Each iteration of the spec opens an independent cursor, so one spec can be
+        run by many threads at the same time, which a Records object cannot.
+
+        Returns:
+            QuerySpec: snapshot of the query
+        """
+        return QuerySpec.from_records(self)
 
 
 class Manager(BaseTableAPI):
+    request_priority = INTERACTIVE
+    # writes of many records (upsert, delete_many, buffered writers) do not take the slots of lookups
+    batch_priority = BULK
     sysparm_input_display_value = None
     sysparm_suppress_auto_sys_field = None
 
@@ -406,9 +773,13 @@ class Manager(BaseTableAPI):
         if self.sysparm_input_display_value:
             params["sysparm_input_display_value"] = self.sysparm_input_display_value
 
+        return params
+
     def retrive(self, sys_id: str):
         result = self.http_client.get(
-            f"{self.default_path}/{self.table}/{sys_id}", params=self._get_params()
+            f"{self.default_path}/{self.table}/{sys_id}",
+            params=self._get_params(),
+            priority=self.request_priority,
         )
 
         data = result.json()
@@ -418,7 +789,10 @@ class Manager(BaseTableAPI):
 
     def create(self, data: dict):
         result = self.http_client.post(
-            f"{self.default_path}/{self.table}", data=data, params=self._get_params()
+            f"{self.default_path}/{self.table}",
+            data=data,
+            params=self._get_params(),
+            priority=self.request_priority,
         )
 
         data = result.json()
@@ -427,18 +801,162 @@ class Manager(BaseTableAPI):
         return data
 
     def delete(self, sys_id: str):
-        result = self.http_client.delete(f"{self.default_path}/{self.table}/{sys_id}")
+        return self._delete(sys_id, priority=self.request_priority)
 
-        data = result.json()
-        if result.http_client.status_code != 200:
-            raise ManagerRetriveException(data)
-        return data
+    def _delete(self, sys_id: str, priority: str):
+        result = self.http_client.delete(
+            f"{self.default_path}/{self.table}/{sys_id}",
+            priority=priority,
+        )
+
+        if result.status_code not in (200, 204):
+            raise ManagerRetriveException(result.json())
+
+        # the Table API answers 204 without body
+        if not result.content:
+            return None
+        return result.json()
+
+    def delete_many(
+        self, sys_ids: list = None, query: QueryBuilder = None, max_workers: int = 4
+    ) -> BulkResult:
+        """Deletes many records, with at most max_workers deletes at the same time.
+        A failed delete does not stop the others.
+
+        Args:
+            sys_ids (list, optional): Sys_ids of records to delete.
+            query (QueryBuilder, optional): Query of records to delete, used when sys_ids is not defined.
+                All matching sys_ids are listed before the first delete, so deletes do not shift the pagination.
+            max_workers (int, optional): Maximum number of concurrent deletes (default: 4).
+
+        Returns:
+            BulkResult: one BulkItemResult by sys_id.
+        """
+        if sys_ids is None:
+            if query is None:
+                raise ManagerRetriveException("sys_ids or query is required")
+
+            records = Records(table=self.table, client=self.http_client)
+            records.only(["sys_id"])
+            records.query = query
+            records.query_no_domain(self.sysparm_query_no_domain)
+            sys_ids = [record["sys_id"] for record in records.all()]
+
+        return run_concurrently(
+            lambda sys_id: self._delete(sys_id, priority=self.batch_priority),
+            sys_ids,
+            max_workers=max_workers,
+        )
+
+    def __lookup_sys_ids(self, match_key: str, values: list) -> dict:
+        records = Records(table=self.table, client=self.http_client)
+        records.only(["sys_id", match_key])
+        records.exclude_reference_link(True)
+        records.query_no_domain(self.sysparm_query_no_domain)
+        records.query.field(match_key).equals(values)
+
+        sys_ids = {}
+        for record in records.all():
+            value = record.get(match_key)
+            if isinstance(value, dict):
+                value = value.get("value")
+            sys_ids[value] = record["sys_id"]
+        return sys_ids
+
+    def __resolve_upserts(self, rows, match_key: str, batch_size: int):
+        """Yields (row, sys_id of existing record or None, error) resolving sys_ids by batches"""
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield from self.__resolve_batch(batch, match_key)
+                batch = []
+        if batch:
+            yield from self.__resolve_batch(batch, match_key)
+
+    def __resolve_batch(self, batch: list, match_key: str):
+        values = [row[match_key] for row in batch if row.get(match_key) not in (None, "")]
+        try:
+            sys_ids = self.__lookup_sys_ids(match_key, values) if values else {}
+        except Exception as e:
+            for row in batch:
+                yield row, None, e
+            return
+
+        for row in batch:
+            if row.get(match_key) in (None, ""):
+                yield row, None, ManagerRetriveException(f"{match_key} is required")
+            else:
+                yield row, sys_ids.get(str(row[match_key])), None
+
+    def upsert(
+        self,
+        rows,
+        match_key: str,
+        max_workers: int = 8,
+        batch_size: int = 100,
+    ) -> BulkResult:
+        """Creates or updates many records, matched to existing ones by match_key.
+        Existing sys_ids are resolved with one query by batch, writes run with at most max_workers
+        at the same time and only return the sys_id. A failed row does not stop the others.
+
+        Args:
+            rows (iterable): dicts with the fields of each record, all with match_key (values should be unique).
+            match_key (str): field that identifies a record, e.g. "employee_number".
+            max_workers (int, optional): Maximum number of concurrent writes (default: 8).
+            batch_size (int, optional): Number of rows by sys_id lookup query (default: 100).
+
+        Returns:
+            BulkResult: one BulkItemResult by row, with {"action": "created" or "updated", "sys_id": ...} as result.
+        """
+        params = self._get_params()
+        params["sysparm_fields"] = "sys_id"
+        params["sysparm_exclude_reference_link"] = True
+        params.pop("sysparm_display_value", None)
+
+        def write(item):
+            row, sys_id, error = item
+            if error:
+                raise error
+
+            if sys_id:
+                result = self.http_client.patch(
+                    f"{self.default_path}/{self.table}/{sys_id}",
+                    data=row,
+                    params=params,
+                    priority=self.batch_priority,
+                )
+                action, status_code = "updated", 200
+            else:
+                result = self.http_client.post(
+                    f"{self.default_path}/{self.table}",
+                    data=row,
+                    params=params,
+                    priority=self.batch_priority,
+                )
+                action, status_code = "created", 201
+
+            data = result.json()
+            if result.status_code != status_code:
+                raise ManagerRetriveException(data)
+            return {"action": action, "sys_id": data["result"]["sys_id"]}
+
+        result = run_concurrently(
+            write,
+            self.__resolve_upserts(rows, match_key, batch_size),
+            max_workers=max_workers,
+        )
+        # report the input row as item, not the internal (row, sys_id, error) tuple
+        for item in result.items:
+            item.item = item.item[0]
+        return result
 
     def full_update(self, sys_id: str, data: dict):
         result = self.http_client.put(
             f"{self.default_path}/{self.table}/{sys_id}",
             data=data,
             params=self._get_params(),
+            priority=self.request_priority,
         )
 
         data = result.json()
@@ -447,10 +965,14 @@ class Manager(BaseTableAPI):
         return data
 
     def update(self, sys_id: str, data: dict):
+        return self._update(sys_id, data, priority=self.request_priority)
+
+    def _update(self, sys_id: str, data: dict, priority: str):
         result = self.http_client.patch(
             f"{self.default_path}/{self.table}/{sys_id}",
             data=data,
             params=self._get_params(),
+            priority=priority,
         )
 
         data = result.json()
@@ -458,12 +980,40 @@ class Manager(BaseTableAPI):
             raise ManagerRetriveException(data)
         return data
 
+    def buffered(
+        self,
+        max_pending: int = 100,
+        flush_interval: float = 5,
+        max_workers: int = 4,
+        on_flush=None,
+    ) -> BufferedWriter:
+        """Returns a writer that merges repeated update() calls on the same record and sends
+        one PATCH by record by window, see BufferedWriter
+
+        Args:
+            max_pending (int, optional): Number of buffered records that triggers a flush (default: 100).
+            flush_interval (float, optional): Seconds between background flushes, None to disable (default: 5).
+            max_workers (int, optional): Maximum number of concurrent PATCHes by flush (default: 4).
+            on_flush (callable, optional): Called with the BulkResult of each flush.
+
+        Returns:
+            BufferedWriter: writer, close it (or use it as context manager) to flush the last changes.
+        """
+        return BufferedWriter(
+            self,
+            max_pending=max_pending,
+            flush_interval=flush_interval,
+            max_workers=max_workers,
+            on_flush=on_flush,
+        )
+
 
 class Vars(BaseTableAPI):
+    request_priority = INTERACTIVE
     __query = QueryBuilder()
 
-    def __init__(self) -> None:
-        super().__init__(table="sc_item_option_mtom")
+    def __init__(self, client: Client = None) -> None:
+        super().__init__(table="sc_item_option_mtom", client=client)
         self.sysparm_limit = 500
 
     def _get_params(self) -> dict:
@@ -486,7 +1036,9 @@ class Vars(BaseTableAPI):
         )
 
         result = self.http_client.get(
-            f"{self.default_path}/{self.table}", params=self._get_params()
+            f"{self.default_path}/{self.table}",
+            params=self._get_params(),
+            priority=self.request_priority,
         )
 
         data = result.json()
@@ -496,9 +1048,25 @@ class Vars(BaseTableAPI):
         return data
 
 
+def _catalog_variables(variables: list):
+    for variable in variables:
+        yield variable
+        yield from _catalog_variables(variable.get("children") or [])
+
+
 class ProducerServiceCatalog(Client):
     default_path = "api/sn_sc/servicecatalog/items"
 
+    def __init__(self, client: Client = None) -> None:
+        # with a client, its session is used and no client of the environment is built
+        if client:
+            self.share(client)
+        else:
+            super().__init__()
+        self.catalog_item_ttl: int = 300
+        self.__catalog_items = {}
+        self.__catalog_items_lock = threading.Lock()
+
     def store(self, catalog_id: str, variables: dict):
         path = f"{catalog_id}/submit_producer"
         result = self.post(f"{self.default_path}/{path}", data={"variables": variables})
@@ -552,3 +1120,142 @@ class ProducerServiceCatalog(Client):
             raise RecordFilterException(data)
 
         return data["result"]
+
+    def get_catalog_item_cached(self, sys_id: str) -> dict:
+        """Retrieves a catalog item information, cached for catalog_item_ttl seconds (default: 300).
+
+        Args:
+            sys_id (str, mandatory): sys id of catalog item
+
+        Return:
+            dict: catalog item information
+        """
+        with self.__catalog_items_lock:
+            cached = self.__catalog_items.get(sys_id)
+            if cached and time.monotonic() - cached[0] < self.catalog_item_ttl:
+                return cached[1]
+
+        item = self.get_catalog_item(sys_id)
+        with self.__catalog_items_lock:
+            self.__catalog_items[sys_id] = (time.monotonic(), item)
+        return item
+
+    def validate_variables(self, catalog_id: str, variables: dict):
+        """Checks variables against the catalog item definition, without submitting anything.
+
+        Args:
+            catalog_id (str, mandatory): service catalog sys id.
+            variables (dict, mandatory): dictionary with variables values.
+
+        Raise:
+            ProducerSubmitException: if a variable is unknown or a mandatory variable is missing.
+        """
+        item = self.get_catalog_item_cached(catalog_id)
+        definitions = {
+            variable["name"]: variable
+            for variable in _catalog_variables(item.get("variables") or [])
+            if variable.get("name")
+        }
+
+        unknown = sorted(set(variables) - set(definitions))
+        missing = sorted(
+            name
+            for name, variable in definitions.items()
+            if variable.get("mandatory") and variables.get(name) in (None, "")
+        )
+
+        if unknown or missing:
+            raise ProducerSubmitException(
+                {"catalog_id": catalog_id, "unknown": unknown, "missing": missing}
+            )
+
+    def order_many(
+        self,
+        orders,
+        max_workers: int = 4,
+        rate_limit: float = None,
+        journal: IdempotencyJournal = None,
+        validate: bool = True,
+        producer: bool = False,
+    ) -> BulkResult:
+        """Submits many catalog orders, with at most max_workers (and rate_limit by second) at the same time.
+        An order whose idempotency key is done in the journal is not submitted again, its recorded result is returned.
+        Orders repeating an idempotency key of the same call are submitted once and get the outcome of the first one.
+
+        Args:
+            orders (iterable, mandatory): dicts with catalog_id, variables and optionally sysparm_quantity
+                and idempotency_key (default: hash of catalog_id, variables and sysparm_quantity).
+            max_workers (int, optional): Maximum number of concurrent submits (default: 4).
+            rate_limit (float, optional): Maximum number of submits by second (default: unlimited).
+            journal (IdempotencyJournal, optional): Journal of submitted orders, use a file journal to keep it
+                between runs (default: in memory, only avoids duplicates in this call).
+            validate (bool, optional): Check variables against the cached catalog item before submitting (default: true).
+            producer (bool, optional): Submit record producers (store) instead of orders (store_task) (default: false).
+
+        Return:
+            BulkResult: one BulkItemResult by order, with the data of ticket opened as result.
+        """
+        if journal is None:
+            journal = IdempotencyJournal()
+
+        limiter = RateLimiter(rate_limit) if rate_limit else None
+        # outcome of each idempotency key submitted by this call, shared with its duplicates
+        outcomes = {}
+        outcomes_lock = threading.Lock()
+
+        def submit(order):
+            catalog_id = order["catalog_id"]
+            variables = order.get("variables", {})
+            quantity = order.get("sysparm_quantity", 1)
+            key = order.get("idempotency_key") or hashlib.sha256(
+                json.dumps([catalog_id, variables, quantity], sort_keys=True).encode()
+            ).hexdigest()
+
+            with outcomes_lock:
+                first = outcomes.get(key)
+                if first is None:
+                    outcomes[key] = outcome = Future()
+            if first is not None:
+                return first.result()
+
+            try:
+                result = submit_once(key, catalog_id, variables, quantity)
+            except Exception as e:
+                outcome.set_exception(e)
+                raise
+            outcome.set_result(result)
+            return result
+
+        def submit_once(key, catalog_id, variables, quantity):
+            if validate:
+                self.validate_variables(catalog_id, variables)
+
+            state, result = journal.begin(key)
+            if state == "done":
+                return result
+            if state == "pending":
+                raise ProducerOutcomeUnknownException(
+                    f"Order {key} was already submitted without a known outcome, check it before retrying"
+                )
+
+            if limiter:
+                limiter.acquire()
+
+            try:
+                if producer:
+                    result = self.store(catalog_id=catalog_id, variables=variables)
+                else:
+                    result = self.store_task(
+                        catalog_id=catalog_id,
+                        variables=variables,
+                        sysparm_quantity=quantity,
+                    )
+            except ManagerRetriveException:
+                # rejected by servicenow, nothing was created
+                journal.discard(key)
+                raise
+
+            journal.done(key, result)
+            return result
+
+        return run_concurrently(submit, orders, max_workers=max_workers)
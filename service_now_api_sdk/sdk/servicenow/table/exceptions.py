@@ -51,3 +51,15 @@ class ManagerUpdateException(ITSMException):
 
 class ProducerSubmitException(ITSMException):
     pass
+
+
+class ExportCheckpointException(ITSMException):
+    pass
+
+
+class ProducerOutcomeUnknownException(ITSMException):
+    pass
+
+
+class ShardLeaseLostException(ITSMException):
+    pass
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+
+from service_now_api_sdk.sdk.servicenow.table.exceptions import (
+    ExportCheckpointException,
+)
+
+
+def write_atomic(file_path: str, content: str):
+    """Replace file content atomically, a crash leaves the old or the new content but never a partial one"""
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, mode="w") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, file_path)
+
+
+class CheckpointedExport:
+    """Exports all records of a query to a NDJSON file, one record by line.
+    The cursor of the next page is checkpointed after each page is written, so running the same export
+    again after a failure resumes from the last completed page.
+
+    Args:
+        records (Records): configured Records instance (table, query, fields, pagination...).
+        file_path (str): NDJSON file to write the records.
+        checkpoint_path (str, optional): checkpoint file, defaults to file_path + ".checkpoint".
+    """
+
+    def __init__(self, records, file_path: str, checkpoint_path: str = None) -> None:
+        self.records = records
+        self.file_path = file_path
+        self.checkpoint_path = checkpoint_path or f"{file_path}.checkpoint"
+
+    def fingerprint(self) -> str:
+        params = self.records._get_params()
+        params.pop("sysparm_offset", None)
+        key = json.dumps(
+            {
+                "table": self.records.table,
+                "params": params,
+                "suppress_pagination_header": self.records.sysparm_suppress_pagination_header,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def load_checkpoint(self) -> dict:
+        """Returns the saved checkpoint, or None when the export has not started yet"""
+        if not os.path.exists(self.checkpoint_path):
+            return None
+
+        with open(self.checkpoint_path) as f:
+            checkpoint = json.load(f)
+
+        if checkpoint.get("fingerprint") != self.fingerprint():
+            raise ExportCheckpointException(
+                f"Checkpoint {self.checkpoint_path} belongs to another query, remove it to start a new export"
+            )
+
+        return checkpoint
+
+    def save_checkpoint(self, checkpoint: dict):
+        write_atomic(self.checkpoint_path, json.dumps(checkpoint))
+
+    def run(self) -> int:
+        """Export all pages, starting from the last checkpoint if any
+
+        Returns:
+            int: number of records in the file
+        """
+        checkpoint = self.load_checkpoint()
+        if checkpoint is None:
+            checkpoint = {
+                "fingerprint": self.fingerprint(),
+                "cursor": None,
+                "rows": 0,
+                "bytes": 0,
+                "finished": False,
+            }
+            if self.records.sysparm_suppress_pagination_header:
+                checkpoint["cursor"] = self.records.sysparm_offset
+
+        if checkpoint["finished"]:
+            return checkpoint["rows"]
+
+        mode = "r+b" if os.path.exists(self.file_path) else "wb"
+        with open(self.file_path, mode=mode) as f:
+            # drop lines of a page written after the last checkpoint
+            f.truncate(checkpoint["bytes"])
+            f.seek(checkpoint["bytes"])
+
+            for rows, next_cursor, _ in self.records._pages(checkpoint["cursor"]):
+                f.write(
+                    "".join(json.dumps(row) + "\n" for row in rows).encode("utf-8")
+                )
+                f.flush()
+                os.fsync(f.fileno())
+
+                checkpoint["cursor"] = next_cursor
+                checkpoint["rows"] += len(rows)
+                checkpoint["bytes"] = f.tell()
+                checkpoint["finished"] = next_cursor is None
+                self.save_checkpoint(checkpoint)
+
+        return checkpoint["rows"]
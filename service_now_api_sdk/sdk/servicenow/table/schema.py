@@ -0,0 +1,278 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, List
+
+from service_now_api_sdk.sdk.servicenow.helpers.paths import private_directory
+from service_now_api_sdk.sdk.servicenow.table.export import write_atomic
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _to_int(value: str) -> int:
+    return int(value)
+
+
+def _to_float(value: str) -> float:
+    return float(value)
+
+
+def _to_decimal(value: str) -> Decimal:
+    return Decimal(value)
+
+
+def _to_bool(value: str) -> bool:
+    return value == "true"
+
+
+def _to_datetime(value: str) -> datetime:
+    # raw date time values are always returned in UTC
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+
+
+def _to_date(value: str) -> date:
+    return date.fromisoformat(value)
+
+
+def _to_time(value: str):
+    return datetime.fromisoformat(value).time()
+
+
+def _to_duration(value: str) -> timedelta:
+    # durations are stored as a date time offset from the epoch
+    return datetime.fromisoformat(value) - _EPOCH
+
+
+_CONVERTERS = {
+    "integer": _to_int,
+    "longint": _to_int,
+    "auto_increment": _to_int,
+    "float": _to_float,
+    "decimal": _to_decimal,
+    "boolean": _to_bool,
+    "glide_date_time": _to_datetime,
+    "due_date": _to_datetime,
+    "calendar_date_time": _to_datetime,
+    "glide_date": _to_date,
+    "glide_time": _to_time,
+    "glide_duration": _to_duration,
+    "timer": _to_duration,
+}
+
+
+def convert_column(internal_type: str, values: list) -> list:
+    """Converts the raw values of one column, empty values become None and values
+    that are not strings (e.g. display_value "all" dicts) or can not be parsed are kept as is
+
+    Args:
+        internal_type (str): sys_dictionary internal type of the column.
+        values (list): raw values of the column.
+
+    Returns:
+        list: converted values
+    """
+    converter = _CONVERTERS.get(internal_type)
+    if converter is None:
+        return values
+
+    converted = []
+    for value in values:
+        if value == "" or value is None:
+            converted.append(None)
+        elif type(value) is not str:
+            converted.append(value)
+        else:
+            try:
+                converted.append(converter(value))
+            except ValueError:
+                converted.append(value)
+    return converted
+
+
+class TableSchema:
+    """Field types of tables, loaded from sys_dictionary (including the fields inherited from parent tables)
+    and cached in memory and on disk for ttl seconds.
+
+    Args:
+        client (Client): http client of the instance.
+        directory (str, optional): cache directory, only accessible by its owner
+            (default: directory of the user in the system temp directory).
+        ttl (int): seconds before the field types of a table are loaded again (default: 1 day).
+    """
+
+    def __init__(self, client, directory: str = None, ttl: int = 24 * 60 * 60) -> None:
+        self.http_client = client
+        self.directory = private_directory(directory, "schema")
+        self.ttl = ttl
+        self.__types = {}
+        self.__lock = threading.Lock()
+
+    def __cache_path(self, table: str) -> str:
+        key = hashlib.sha256(
+            f"{self.http_client.base_url}/{table}".encode("utf-8")
+        ).hexdigest()
+        return os.path.join(self.directory, f"{key}.json")
+
+    def __read_cache(self, table: str) -> dict:
+        try:
+            with open(self.__cache_path(table)) as f:
+                cached = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        if time.time() - cached.get("loaded_at", 0) > self.ttl:
+            return None
+        return cached
+
+    def __write_cache(self, table: str, types: dict):
+        write_atomic(
+            self.__cache_path(table),
+            json.dumps({"loaded_at": time.time(), "types": types}),
+        )
+
+    def __hierarchy(self, table: str) -> List[str]:
+        from service_now_api_sdk.sdk.servicenow.table.client import Records
+
+        tables = []
+        while table and table not in tables:
+            tables.append(table)
+            records = Records("sys_db_object", client=self.http_client)
+            records.only(["name", "super_class.name"]).limit(1)
+            records.query.field("name").equals(table)
+            rows = records.get().data
+            table = rows[0].get("super_class.name") if rows else None
+        return tables
+
+    def __load(self, table: str) -> dict:
+        from service_now_api_sdk.sdk.servicenow.table.client import Records
+
+        hierarchy = self.__hierarchy(table)
+        records = Records("sys_dictionary", client=self.http_client)
+        records.only(["name", "element", "internal_type"]).limit(1000)
+        for position, name in enumerate(hierarchy):
+            if position:
+                records.query.OR()
+            records.query.field("name").equals(name)
+        records.query.AND().field("element").is_not_empty()
+
+        by_table = {}
+        for row in records.all():
+            internal_type = row.get("internal_type")
+            if isinstance(internal_type, dict):
+                internal_type = internal_type.get("value")
+            by_table.setdefault(row.get("name"), {})[row.get("element")] = internal_type
+
+        # fields of child tables override the ones inherited from parent tables
+        types = {}
+        for name in reversed(hierarchy):
+            types.update(by_table.get(name, {}))
+        return types
+
+    def field_types(self, table: str) -> Dict[str, str]:
+        """Returns the internal type of each field of table, e.g. {"opened_at": "glide_date_time"}
+
+        Args:
+            table (str): table name.
+
+        Returns:
+            dict: internal type by field name
+        """
+        cached = self.__types.get(table)
+        if cached and time.time() - cached["loaded_at"] <= self.ttl:
+            return cached["types"]
+
+        with self.__lock:
+            cached = self.__types.get(table)
+            if cached and time.time() - cached["loaded_at"] <= self.ttl:
+                return cached["types"]
+
+            cached = self.__read_cache(table)
+            if cached is None:
+                cached = {"loaded_at": time.time(), "types": self.__load(table)}
+                self.__write_cache(table, cached["types"])
+
+            self.__types[table] = cached
+            return cached["types"]
+
+    def invalidate(self, table: str = None):
+        """Discards the cached field types of table, or of all tables when it is not given"""
+        with self.__lock:
+            tables = [table] if table else list(self.__types)
+            self.__types = {k: v for k, v in self.__types.items() if k not in tables}
+            for name in tables:
+                try:
+                    os.remove(self.__cache_path(name))
+                except FileNotFoundError:
+                    pass
+
+
+class TypeCoercer:
+    """Converts pages of raw Table API rows into native types (int, float, Decimal, bool, datetime,
+    date, time and timedelta), column by column. Pages with at least process_threshold rows are
+    converted on a process pool, one task by column.
+
+    Args:
+        schema (TableSchema): field types source.
+        process_threshold (int): minimum rows of a page to use the process pool, None to disable (default: 20000).
+        max_workers (int, optional): processes of the pool (default: number of CPUs).
+    """
+
+    def __init__(
+        self, schema: TableSchema, process_threshold: int = 20000, max_workers: int = None
+    ) -> None:
+        self.schema = schema
+        self.process_threshold = process_threshold
+        self.max_workers = max_workers
+        self.__executor = None
+        self.__lock = threading.Lock()
+
+    def __get_executor(self):
+        # imported on first use, it is one of the slowest imports of the table module
+        from concurrent.futures import ProcessPoolExecutor
+
+        with self.__lock:
+            if self.__executor is None:
+                self.__executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self.__executor
+
+    def coerce(self, table: str, rows: list) -> list:
+        """Converts the values of rows in place
+
+        Args:
+            table (str): table of rows.
+            rows (list): rows returned by the Table API.
+
+        Returns:
+            list: the same rows
+        """
+        if not rows:
+            return rows
+
+        types = self.schema.field_types(table)
+        fields = [field for field in rows[0] if types.get(field) in _CONVERTERS]
+        internal_types = [types[field] for field in fields]
+        columns = [[row.get(field) for row in rows] for field in fields]
+
+        if self.process_threshold and len(rows) >= self.process_threshold:
+            converted = self.__get_executor().map(
+                convert_column, internal_types, columns
+            )
+        else:
+            converted = map(convert_column, internal_types, columns)
+
+        for field, values in zip(fields, converted):
+            for row, value in zip(rows, values):
+                if field in row:
+                    row[field] = value
+        return rows
+
+    def close(self):
+        """Shuts down the process pool"""
+        with self.__lock:
+            if self.__executor is not None:
+                self.__executor.shutdown()
+            self.__executor = None
@@ -0,0 +1,552 @@
+import hashlib
+import json
+import os
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List
+
+from service_now_api_sdk.sdk.servicenow.helpers.query_builder import datetime_as_utc
+from service_now_api_sdk.sdk.servicenow.table.exceptions import (
+    ExportCheckpointException,
+    QueryExpressionError,
+    ShardLeaseLostException,
+)
+from service_now_api_sdk.sdk.servicenow.table.spec import QuerySpec
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+COLUMNS = (
+    "shard_id, position, condition, state, worker, lease_until, "
+    "cursor, rows, bytes, file, attempts, error"
+)
+
+
+@dataclass
+class Shard:
+    """A part of a sharded export, exported by one worker at a time
+
+    Attributes:
+        shard_id (str): shard identifier.
+        position (int): order of the shard in the export.
+        condition (str): encoded condition added to the query of the export.
+        state (str): pending, leased, done or failed.
+        worker (str): worker holding the lease, or the last one.
+        lease_until (float): time (time.time()) when the lease expires.
+        cursor (str | int): cursor of the next page, None when the shard has not started.
+        rows (int): records written.
+        bytes (int): size of file after the last written page.
+        file (str): NDJSON file of the shard.
+        attempts (int): leases taken on the shard.
+        error (str): last error of the shard.
+    """
+
+    shard_id: str
+    position: int
+    condition: str
+    state: str = PENDING
+    worker: str = None
+    lease_until: float = None
+    cursor: object = None
+    rows: int = 0
+    bytes: int = 0
+    file: str = None
+    attempts: int = 0
+    error: str = None
+
+
+def _shard(row) -> Shard:
+    shard = Shard(*row)
+    shard.cursor = json.loads(shard.cursor) if shard.cursor is not None else None
+    return shard
+
+
+def sys_id_conditions(prefix_length: int = 1) -> List[tuple]:
+    """Splits the sys_id space into 16 ** prefix_length ranges of hexadecimal prefixes,
+    the first and last ranges are open so sys_ids that are not hexadecimal are not missed
+
+    Returns:
+        list: (shard_id, condition)
+    """
+    prefixes = [format(i, f"0{prefix_length}x") for i in range(16**prefix_length)]
+    conditions = []
+    for i, prefix in enumerate(prefixes):
+        terms = []
+        if i > 0:
+            terms.append(f"sys_id>={prefix}")
+        if i < len(prefixes) - 1:
+            terms.append(f"sys_id<{prefixes[i + 1]}")
+        conditions.append((f"sys_id-{prefix}", "^".join(terms)))
+    return conditions
+
+
+def date_conditions(
+    field: str, start: datetime, end: datetime, interval: timedelta
+) -> List[tuple]:
+    """Splits a date field into ranges of interval between start and end. The first and last ranges are open
+    and one more shard has the empty values, so records out of [start, end) are not missed
+
+    Returns:
+        list: (shard_id, condition)
+    """
+    if interval <= timedelta(0):
+        raise QueryExpressionError("interval must be positive")
+
+    start, end = datetime_as_utc(start), datetime_as_utc(end)
+    boundaries = []
+    boundary = start + interval
+    while boundary < end:
+        boundaries.append(boundary.strftime(DATETIME_FORMAT))
+        boundary += interval
+
+    conditions = [(f"{field}-empty", f"{field}ISEMPTY")]
+    lower = None
+    for upper in boundaries + [None]:
+        terms = []
+        if lower:
+            terms.append(f"{field}>={lower}")
+        if upper:
+            terms.append(f"{field}<{upper}")
+        shard_id = f"{field}-{(lower or 'start').replace(' ', 'T').replace(':', '')}"
+        conditions.append((shard_id, "^".join(terms) or f"{field}ISNOTEMPTY"))
+        lower = upper
+    return conditions
+
+
+class ShardedExport:
+    """Exports the records of a query split into shards (sys_id or date ranges) by any number of workers,
+    in processes of one node or many. Shards are a work queue in a shared SQLite database: a worker claims
+    a shard with a lease, writes its pages to a NDJSON file of the shard, checkpoints the cursor after each
+    page and renews the lease while it works. A shard whose lease has expired (a worker that died or hung)
+    is claimed again by another worker and resumes from its last checkpoint. A shard is marked as failed
+    after max_attempts leases.
+    Workers of many nodes need the database and directory on a shared file system with working locks,
+    and clocks synchronized well below lease_seconds.
+
+    Args:
+        spec (QuerySpec | Records): query to export.
+        database_path (str): SQLite database of shards, created if it does not exist.
+        directory (str): directory of the NDJSON files of shards.
+        lease_seconds (float): seconds a lease lasts without being renewed (default: 300).
+        max_attempts (int): leases of a shard before it is marked as failed (default: 5).
+        poll_interval (float): seconds between claims while every shard left is leased (default: 5).
+    """
+
+    def __init__(
+        self,
+        spec,
+        database_path: str,
+        directory: str,
+        lease_seconds: float = 300,
+        max_attempts: int = 5,
+        poll_interval: float = 5,
+    ) -> None:
+        self.spec: QuerySpec = spec if isinstance(spec, QuerySpec) else spec.spec()
+        self.database_path = database_path
+        self.directory = directory
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        os.makedirs(directory, exist_ok=True)
+
+        connection = self.__connect()
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS export_meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS shards ("
+                "shard_id TEXT PRIMARY KEY, position INTEGER NOT NULL, condition TEXT NOT NULL, "
+                "state TEXT NOT NULL, worker TEXT, lease_until REAL, cursor TEXT, "
+                "rows INTEGER NOT NULL DEFAULT 0, bytes INTEGER NOT NULL DEFAULT 0, file TEXT, "
+                "attempts INTEGER NOT NULL DEFAULT 0, error TEXT)"
+            )
+        finally:
+            connection.close()
+
+    def __connect(self):
+        return sqlite3.connect(self.database_path, timeout=30, isolation_level=None)
+
+    @contextmanager
+    def __transaction(self):
+        # IMMEDIATE takes the write lock first, so two workers never claim the same shard
+        connection = self.__connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+        finally:
+            connection.close()
+
+    def fingerprint(self) -> str:
+        params = self.spec.params()
+        params.pop("sysparm_offset", None)
+        key = json.dumps(
+            {
+                "table": self.spec.table,
+                "params": params,
+                "suppress_pagination_header": self.spec.options[
+                    "sysparm_suppress_pagination_header"
+                ],
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def plan(self, conditions: List[tuple]) -> int:
+        """Creates the shards of the export, unless they were already planned (by this or another worker)
+
+        Args:
+            conditions (list): (shard_id, encoded condition) of each shard, conditions must not overlap
+                and together must cover every record of the query.
+
+        Returns:
+            int: number of shards
+        """
+        fingerprint = self.fingerprint()
+        with self.__transaction() as connection:
+            stored = connection.execute(
+                "SELECT value FROM export_meta WHERE key = 'fingerprint'"
+            ).fetchone()
+            if stored and stored[0] != fingerprint:
+                raise ExportCheckpointException(
+                    f"Database {self.database_path} belongs to another export, remove it to start a new one"
+                )
+
+            (count,) = connection.execute("SELECT COUNT(*) FROM shards").fetchone()
+            if count:
+                return count
+
+            connection.execute(
+                "INSERT OR REPLACE INTO export_meta (key, value) VALUES ('fingerprint', ?)",
+                (fingerprint,),
+            )
+            connection.executemany(
+                "INSERT INTO shards (shard_id, position, condition, state) VALUES (?, ?, ?, ?)",
+                [
+                    (shard_id, position, condition, PENDING)
+                    for position, (shard_id, condition) in enumerate(conditions)
+                ],
+            )
+        return len(conditions)
+
+    def plan_sys_id(self, prefix_length: int = 1) -> int:
+        """Creates 16 ** prefix_length shards by ranges of sys_id (default: 16), see plan()
+
+        Args:
+            prefix_length (int): hexadecimal digits of the sys_id prefix of shards (default: 1)
+
+        Returns:
+            int: number of shards
+        """
+        return self.plan(sys_id_conditions(prefix_length))
+
+    def plan_dates(
+        self,
+        start: datetime,
+        end: datetime,
+        interval: timedelta,
+        field: str = "sys_created_on",
+    ) -> int:
+        """Creates shards by ranges of interval of a date field between start and end, see plan().
+        Records before start and after end belong to the first and last shards, empty values to their own shard.
+
+        Args:
+            start (datetime): start of the first range (naive UTC datetime or tz-aware datetime)
+            end (datetime): end of the last range (naive UTC datetime or tz-aware datetime)
+            interval (timedelta): length of ranges
+            field (str): date field (default: sys_created_on)
+
+        Returns:
+            int: number of shards
+        """
+        return self.plan(date_conditions(field, start, end, interval))
+
+    def shards(self) -> List[Shard]:
+        """Returns the shards of the export in order"""
+        connection = self.__connect()
+        try:
+            rows = connection.execute(
+                f"SELECT {COLUMNS} FROM shards ORDER BY position"
+            ).fetchall()
+        finally:
+            connection.close()
+        return [_shard(row) for row in rows]
+
+    def progress(self) -> dict:
+        """Returns the number of shards by state and the records written"""
+        progress = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0, "rows": 0}
+        for shard in self.shards():
+            progress[shard.state] += 1
+            progress["rows"] += shard.rows
+        return progress
+
+    def claim(self, worker_id: str) -> Shard:
+        """Takes the lease of the first pending shard, or of a shard whose lease has expired
+
+        Args:
+            worker_id (str): identifier of the worker
+
+        Returns:
+            Shard: leased shard, None when there is no shard to claim
+        """
+        now = time.time()
+        with self.__transaction() as connection:
+            while True:
+                row = connection.execute(
+                    f"SELECT {COLUMNS} FROM shards WHERE state = ? OR (state = ? AND lease_until < ?) "
+                    "ORDER BY position LIMIT 1",
+                    (PENDING, LEASED, now),
+                ).fetchone()
+                if row is None:
+                    return None
+
+                shard = _shard(row)
+                if shard.state == LEASED:
+                    shard.error = f"Lease of worker {shard.worker} expired"
+                if shard.attempts >= self.max_attempts:
+                    connection.execute(
+                        "UPDATE shards SET state = ?, lease_until = NULL, error = ? WHERE shard_id = ?",
+                        (FAILED, shard.error, shard.shard_id),
+                    )
+                    continue
+                break
+
+            previous_file = shard.file
+            shard.state = LEASED
+            shard.worker = worker_id
+            shard.lease_until = now + self.lease_seconds
+            shard.attempts += 1
+            # each lease writes its own file, a worker that lost its lease never writes in the file of the next one
+            shard.file = os.path.join(
+                self.directory,
+                f"{self.spec.table}-{shard.shard_id}.{shard.attempts}.ndjson",
+            )
+            connection.execute(
+                "UPDATE shards SET state = ?, worker = ?, lease_until = ?, attempts = ?, file = ?, error = ? "
+                "WHERE shard_id = ?",
+                (
+                    shard.state,
+                    shard.worker,
+                    shard.lease_until,
+                    shard.attempts,
+                    shard.file,
+                    shard.error,
+                    shard.shard_id,
+                ),
+            )
+
+        self.__resume_file(shard, previous_file)
+        return shard
+
+    def __resume_file(self, shard: Shard, previous_file: str):
+        """Copies the pages checkpointed by the previous lease into the file of the new one"""
+        with open(shard.file, mode="wb") as f:
+            if shard.bytes and previous_file and os.path.exists(previous_file):
+                with open(previous_file, mode="rb") as previous:
+                    remaining = shard.bytes
+                    while remaining > 0:
+                        chunk = previous.read(min(remaining, 1024 * 1024))
+                        if not chunk:
+                            break
+                        f.write(chunk)
+                        remaining -= len(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+
+        if shard.bytes and os.path.getsize(shard.file) < shard.bytes:
+            # the previous file is not reachable from this worker, the shard starts again
+            shard.cursor, shard.rows, shard.bytes = None, 0, 0
+            self.__save(shard, LEASED)
+            os.truncate(shard.file, 0)
+
+        if previous_file and previous_file != shard.file:
+            try:
+                os.remove(previous_file)
+            except OSError:
+                pass
+
+    def __save(self, shard: Shard, state: str):
+        now = time.time()
+        with self.__transaction() as connection:
+            updated = connection.execute(
+                "UPDATE shards SET state = ?, lease_until = ?, cursor = ?, rows = ?, bytes = ?, error = ? "
+                "WHERE shard_id = ? AND worker = ? AND state = ?",
+                (
+                    state,
+                    now + self.lease_seconds if state == LEASED else None,
+                    json.dumps(shard.cursor) if shard.cursor is not None else None,
+                    shard.rows,
+                    shard.bytes,
+                    shard.error,
+                    shard.shard_id,
+                    shard.worker,
+                    LEASED,
+                ),
+            ).rowcount
+        if not updated:
+            raise ShardLeaseLostException(
+                f"Lease of shard {shard.shard_id} was taken by another worker"
+            )
+        shard.state = state
+
+    def heartbeat(self, shard: Shard):
+        """Renews the lease of a shard
+
+        Args:
+            shard (Shard): shard leased by this worker
+        """
+        with self.__transaction() as connection:
+            updated = connection.execute(
+                "UPDATE shards SET lease_until = ? WHERE shard_id = ? AND worker = ? AND state = ?",
+                (time.time() + self.lease_seconds, shard.shard_id, shard.worker, LEASED),
+            ).rowcount
+        if not updated:
+            raise ShardLeaseLostException(
+                f"Lease of shard {shard.shard_id} was taken by another worker"
+            )
+
+    def release(self, shard: Shard, error: str = None):
+        """Gives back a leased shard, the next lease resumes from its last checkpoint
+
+        Args:
+            shard (Shard): shard leased by this worker
+            error (str, optional): error that stopped the shard
+        """
+        shard.error = error
+        self.__save(shard, PENDING)
+
+    def export_shard(self, shard: Shard) -> int:
+        """Writes the pages of a leased shard from its last checkpoint, renewing the lease while pages are requested
+
+        Args:
+            shard (Shard): shard leased by this worker
+
+        Returns:
+            int: number of records of the shard
+        """
+        records = self.spec.where(shard.condition).records()
+        cursor = shard.cursor
+        if cursor is None and records.sysparm_suppress_pagination_header:
+            cursor = records.sysparm_offset
+
+        stop = threading.Event()
+        lost = threading.Event()
+
+        def renew():
+            while not stop.wait(self.lease_seconds / 3):
+                try:
+                    self.heartbeat(shard)
+                except ShardLeaseLostException:
+                    lost.set()
+                    return
+                except Exception:
+                    # a busy database is retried on the next beat
+                    continue
+
+        heartbeat = threading.Thread(target=renew, daemon=True)
+        heartbeat.start()
+        try:
+            with open(shard.file, mode="r+b") as f:
+                f.truncate(shard.bytes)
+                f.seek(shard.bytes)
+
+                for rows, next_cursor, _ in records._pages(cursor):
+                    if lost.is_set():
+                        raise ShardLeaseLostException(
+                            f"Lease of shard {shard.shard_id} was taken by another worker"
+                        )
+                    f.write(
+                        "".join(json.dumps(row) + "\n" for row in rows).encode("utf-8")
+                    )
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                    shard.cursor = next_cursor
+                    shard.rows += len(rows)
+                    shard.bytes = f.tell()
+                    shard.error = None
+                    # the last page finishes the shard in the same update, it is never requested again
+                    self.__save(shard, DONE if next_cursor is None else LEASED)
+        finally:
+            stop.set()
+            heartbeat.join()
+
+        return shard.rows
+
+    def run(self, worker_id: str = None, wait: bool = True) -> int:
+        """Claims and exports shards until every shard is done or failed
+
+        Args:
+            worker_id (str, optional): identifier of the worker (default: host, process and random suffix)
+            wait (bool): True to wait while the shards left are leased by other workers, to claim them
+                if their leases expire (default: true)
+
+        Returns:
+            int: number of records written by this worker
+        """
+        if worker_id is None:
+            worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        written = 0
+        while True:
+            shard = self.claim(worker_id)
+            if shard is None:
+                progress = self.progress()
+                if not wait or not (progress[PENDING] or progress[LEASED]):
+                    return written
+                time.sleep(self.poll_interval)
+                continue
+
+            rows = shard.rows
+            try:
+                written += self.export_shard(shard) - rows
+            except ShardLeaseLostException as e:
+                print("Error: " + str(e))
+            except Exception as e:
+                print("Error: " + str(e))
+                print(f"Shard {shard.shard_id} released for another attempt")
+                try:
+                    self.release(shard, error=str(e))
+                except ShardLeaseLostException:
+                    pass
+
+    def merge(self, file_path: str) -> int:
+        """Concatenates the files of every shard, in order, into one NDJSON file
+
+        Args:
+            file_path (str): NDJSON file to write.
+
+        Returns:
+            int: number of records in the file
+        """
+        shards = self.shards()
+        unfinished = [shard.shard_id for shard in shards if shard.state != DONE]
+        if unfinished:
+            raise ExportCheckpointException(f"Shards {unfinished} are not done")
+
+        tmp_path = f"{file_path}.tmp"
+        with open(tmp_path, mode="wb") as f:
+            for shard in shards:
+                with open(shard.file, mode="rb") as part:
+                    shutil.copyfileobj(part, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+        return sum(shard.rows for shard in shards)
@@ -0,0 +1,158 @@
+import copy
+from dataclasses import dataclass, field, replace
+from types import MappingProxyType
+from typing import Mapping
+
+from service_now_api_sdk.sdk.servicenow.helpers.client import Client
+from service_now_api_sdk.sdk.servicenow.helpers.query_builder import QueryBuilder
+
+# configuration of Records copied into a spec, the pagination state (data, next link...) is not
+OPTIONS = (
+    "sysparm_display_value",
+    "sysparm_exclude_reference_link",
+    "sysparm_fields",
+    "sysparm_query_no_domain",
+    "sysparm_view",
+    "sysparm_limit",
+    "sysparm_offset",
+    "sysparm_suppress_pagination_header",
+    "sysparm_query_category",
+    "sysparm_no_count",
+    "sysparm_count",
+    "response_timeout",
+    "request_priority",
+    "prefetch_depth",
+    "spill_max_memory_bytes",
+    "spill_directory",
+    "type_coercer",
+    "query_cache",
+)
+
+
+def _encoded_query(query: str) -> QueryBuilder:
+    """QueryBuilder holding an encoded query as is"""
+    query_builder = QueryBuilder()
+    if query:
+        query_builder._query = [query]
+        query_builder.current_field = query
+        query_builder.c_oper = "encoded"
+    return query_builder
+
+
+@dataclass(frozen=True)
+class QuerySpec:
+    """Immutable snapshot of a Records query: table, client, options and query.
+    A spec never changes after it is created, each iteration opens an independent cursor on a new Records
+    object, so the same spec can be run by many threads at the same time.
+    Build it with Records.spec().
+
+    Attributes:
+        table (str): table name.
+        client (Client): http client of the instance, shared by every cursor.
+        options (Mapping): read-only Records options (sysparm_limit, sysparm_fields, response_timeout...).
+        query (str): encoded query ("" when there is no query).
+    """
+
+    table: str
+    client: Client
+    options: Mapping = field(repr=False)
+    query: str = ""
+    _query_builder: QueryBuilder = field(default=None, repr=False, compare=False)
+
+    @classmethod
+    def from_records(cls, records) -> "QuerySpec":
+        """Returns the spec of the current configuration of a Records object
+
+        Args:
+            records (Records): configured Records instance.
+
+        Returns:
+            QuerySpec: spec of records, later changes of records do not change it
+        """
+        query_builder = copy.deepcopy(records.query)
+        return cls(
+            table=records.table,
+            client=records.http_client,
+            options=MappingProxyType(
+                {name: getattr(records, name) for name in OPTIONS}
+            ),
+            query=str(query_builder) if query_builder._query else "",
+            _query_builder=query_builder,
+        )
+
+    def query_builder(self) -> QueryBuilder:
+        """Returns a copy of the QueryBuilder of the spec, changing it does not change the spec"""
+        return copy.deepcopy(self._query_builder or QueryBuilder())
+
+    def where(self, condition: str) -> "QuerySpec":
+        """Returns a new spec whose query also requires an encoded condition (added to every ^NQ part),
+        e.g. spec.where("sys_created_on>=2024-01-01 00:00:00")
+
+        Args:
+            condition (str): encoded condition.
+
+        Returns:
+            QuerySpec: new spec, this one is not changed
+        """
+        queries, order_by = [], []
+        for query in self.query.split("^NQ"):
+            terms = [term for term in query.split("^") if term]
+            order_by += [term for term in terms if term.startswith("ORDERBY")]
+            queries.append(
+                "^".join(
+                    [term for term in terms if not term.startswith("ORDERBY")]
+                    + [condition]
+                )
+            )
+        query = "^".join(["^NQ".join(queries), *dict.fromkeys(order_by)])
+        return replace(self, query=query, _query_builder=_encoded_query(query))
+
+    def records(self):
+        """Returns a new Records object configured by the spec, with its own pagination state
+
+        Returns:
+            Records: new Records instance
+        """
+        # imported on use, table.client imports this module
+        from service_now_api_sdk.sdk.servicenow.table.client import Records
+
+        records = Records(self.table, client=self.client)
+        for name, value in self.options.items():
+            setattr(records, name, value)
+        records.query = self.query_builder()
+        return records
+
+    def params(self) -> dict:
+        """Returns the params of the first request of the spec"""
+        return self.records()._get_params()
+
+    def pages(self):
+        """Opens a cursor and yields the records of each page, from the first one until the last one
+
+        Returns:
+            generator: list of records by page
+        """
+        records = self.records()
+        cursor = None
+        if records.sysparm_suppress_pagination_header:
+            cursor = records.sysparm_offset
+
+        for rows, _, _ in records._pages(cursor):
+            yield records._coerce(rows)
+
+    def __iter__(self):
+        """Opens a cursor and yields every record of the spec"""
+        for rows in self.pages():
+            yield from rows
+
+    def all(self):
+        """Requests all pages of records, see Records.all()
+
+        Returns:
+            list: all records of the spec (SpillBuffer when spill is enabled)
+        """
+        return self.records().all()
+
+    def count(self) -> int:
+        """Returns the number of records matching the spec, see Records.count()"""
+        return self.records().count()
@@ -0,0 +1,264 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from time import monotonic, sleep
+
+from service_now_api_sdk.sdk.servicenow.helpers.query_builder import datetime_as_utc
+from service_now_api_sdk.sdk.servicenow.table.exceptions import (
+    RecordFilterException,
+    RecordRetriesException,
+)
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+EPOCH = "1970-01-01 00:00:00"
+
+
+def _raw(value):
+    if isinstance(value, dict):
+        return value.get("value")
+    return value
+
+
+@dataclass
+class RecordChange:
+    """A created or updated record
+
+    Attributes:
+        action (str): created or updated.
+        record (dict): the record, with the fields of the query.
+        sys_id (str): sys_id of record.
+        updated_on (str): sys_updated_on of record (UTC).
+    """
+
+    action: str
+    record: dict
+    sys_id: str
+    updated_on: str
+
+
+class ChangeFeed:
+    """Polls a table for records created or updated since a sys_updated_on cursor.
+    Records are requested ordered by (sys_updated_on, sys_id) with sys_updated_on >= cursor, so records
+    updated in the same second as the cursor are not missed, and the ones already yielded are skipped by
+    their (sys_id, sys_updated_on) key. The polling interval shrinks while there are changes and grows
+    while the table is quiet, a full page is followed by the next one without waiting, and the time the
+    consumer spends on the changes counts as waiting time.
+
+    Args:
+        records (Records): configured Records instance (table, query, fields...).
+        since (datetime | str, optional): cursor to start from (default: last sys_updated_on of the query).
+        min_interval (float): shortest seconds between polls (default: 5).
+        max_interval (float): longest seconds between polls (default: 300).
+        backoff (float): factor applied to the interval after each poll (default: 2).
+        overlap (int): seconds re-read before the cursor, for changes committed late (default: 0).
+        page_size (int): records by request (default: limit of records).
+        retries (int): consecutive failed polls before RecordRetriesException is raised (default: 5).
+        stop (threading.Event, optional): ends the feed when set.
+    """
+
+    def __init__(
+        self,
+        records,
+        since=None,
+        min_interval: float = 5,
+        max_interval: float = 300,
+        backoff: float = 2,
+        overlap: int = 0,
+        page_size: int = None,
+        retries: int = 5,
+        stop=None,
+    ) -> None:
+        if records.sysparm_display_value in (True, "true"):
+            raise RecordFilterException(
+                "watch() requires actual sys_updated_on values, use display_value false or all"
+            )
+
+        self.records = records
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.overlap = overlap
+        self.page_size = page_size or records.sysparm_limit
+        self.retries = retries
+        self.stop = stop
+        self.interval = min_interval
+        self.cursor: str = None
+        if since is not None:
+            self.cursor = (
+                datetime_as_utc(since).strftime(DATETIME_FORMAT)
+                if hasattr(since, "strftime")
+                else since
+            )
+        self.__seen = {}
+        self.__offset = 0
+
+    def __base_queries(self) -> list:
+        if not self.records.query._query:
+            return [""]
+        # ordering is given by the feed, each ^NQ part gets the cursor condition
+        return [
+            "^".join(
+                term
+                for term in query.split("^")
+                if term and not term.startswith("ORDERBY")
+            )
+            for query in str(self.records.query).split("^NQ")
+        ]
+
+    def __params(self, condition: str, order: str, limit: int, offset: int = 0) -> dict:
+        params = self.records._get_params()
+        query = "^NQ".join(
+            "^".join(part for part in (base, condition) if part)
+            for base in self.__base_queries()
+        )
+        params["sysparm_query"] = "^".join(part for part in (query, order) if part)
+        params["sysparm_limit"] = limit
+        params.pop("sysparm_offset", None)
+        if offset:
+            params["sysparm_offset"] = offset
+        if self.records.sysparm_fields:
+            fields = self.records.sysparm_fields.split(",")
+            for name in ("sys_id", "sys_updated_on", "sys_created_on", "sys_mod_count"):
+                if name not in fields:
+                    fields.append(name)
+            params["sysparm_fields"] = ",".join(fields)
+        return params
+
+    def __request(self, params: dict) -> list:
+        result = self.records.http_client.get(
+            f"{self.records.default_path}/{self.records.table}",
+            params=params,
+            timeout=self.records.response_timeout,
+            priority=self.records.request_priority,
+        )
+        if result.status_code != 200:
+            raise RecordFilterException(result.text)
+        return result.json().get("result", [])
+
+    @staticmethod
+    def __key(row: dict) -> tuple:
+        return _raw(row.get("sys_id")), _raw(row.get("sys_updated_on"))
+
+    def __start(self):
+        """Starts from the last change of the query, without yielding it"""
+        rows = self.__request(self.__params("", "ORDERBYDESCsys_updated_on", 1))
+        self.cursor = _raw(rows[0].get("sys_updated_on")) if rows else EPOCH
+        if not rows:
+            return
+
+        offset = 0
+        while True:
+            rows = self.__request(
+                self.__params(
+                    f"sys_updated_on={self.cursor}",
+                    "ORDERBYsys_id",
+                    self.page_size,
+                    offset,
+                )
+            )
+            for row in rows:
+                self.__seen[self.__key(row)] = self.cursor
+            if len(rows) < self.page_size:
+                return
+            offset += self.page_size
+
+    def __window_start(self) -> str:
+        if not self.overlap:
+            return self.cursor
+        start = datetime.strptime(self.cursor, DATETIME_FORMAT) - timedelta(
+            seconds=self.overlap
+        )
+        return start.strftime(DATETIME_FORMAT)
+
+    def poll(self) -> tuple:
+        """Requests one page of changes
+
+        Returns:
+            tuple: (list of RecordChange not yielded yet, True when the page was full)
+        """
+        if self.cursor is None:
+            self.__start()
+
+        window_start = self.__window_start()
+        rows = self.__request(
+            self.__params(
+                f"sys_updated_on>={window_start}",
+                "ORDERBYsys_updated_on^ORDERBYsys_id",
+                self.page_size,
+                self.__offset,
+            )
+        )
+
+        changes = []
+        cursor = self.cursor
+        for row in rows:
+            sys_id, updated_on = self.__key(row)
+            cursor = max(cursor, updated_on or "")
+            if (sys_id, updated_on) in self.__seen:
+                continue
+            self.__seen[(sys_id, updated_on)] = updated_on
+
+            mod_count = _raw(row.get("sys_mod_count"))
+            if mod_count is not None and mod_count != "":
+                action = "created" if str(mod_count) == "0" else "updated"
+            else:
+                created_on = _raw(row.get("sys_created_on"))
+                action = "created" if created_on == updated_on else "updated"
+            changes.append(
+                RecordChange(
+                    action=action, record=row, sys_id=sys_id, updated_on=updated_on
+                )
+            )
+
+        full = len(rows) >= self.page_size
+        if full and cursor == self.cursor:
+            # a whole page in the same window, move inside it
+            self.__offset += self.page_size
+        else:
+            self.__offset = 0
+        self.cursor = cursor
+
+        # keys older than the window are never returned again
+        window_start = self.__window_start()
+        self.__seen = {
+            key: updated_on
+            for key, updated_on in self.__seen.items()
+            if updated_on >= window_start
+        }
+        return changes, full
+
+    def __iter__(self):
+        failures = 0
+        last_poll = None
+        while not (self.stop and self.stop.is_set()):
+            if last_poll is not None:
+                wait = self.interval - (monotonic() - last_poll)
+                if wait > 0:
+                    if self.stop:
+                        if self.stop.wait(wait):
+                            return
+                    else:
+                        sleep(wait)
+
+            last_poll = monotonic()
+            try:
+                changes, full = self.poll()
+                failures = 0
+            except Exception as e:
+                failures += 1
+                if failures > self.retries:
+                    raise RecordRetriesException(e)
+                self.interval = min(self.max_interval, self.interval * self.backoff)
+                print("Error: " + str(e))
+                print(f"Retry in {self.interval}s")
+                continue
+
+            if full:
+                self.interval = self.min_interval
+                last_poll = None
+            elif changes:
+                self.interval = max(self.min_interval, self.interval / self.backoff)
+            else:
+                self.interval = min(self.max_interval, self.interval * self.backoff)
+
+            # the next poll only happens when the consumer asks for more
+            yield from changes
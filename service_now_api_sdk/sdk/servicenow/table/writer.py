@@ -0,0 +1,119 @@
+import threading
+
+from service_now_api_sdk.sdk.servicenow.helpers.bulk import BulkResult, run_concurrently
+
+
+class BufferedWriter:
+    """Buffers Manager.update calls, merging the pending field changes of each record so that only one PATCH
+    by record is sent by window. Pending changes are flushed when max_pending records are buffered,
+    every flush_interval seconds, on flush() and on close(). An error of a background flush (e.g. raised by on_flush)
+    does not stop the next ones, it is raised by the next update() or close().
+
+    Args:
+        manager (Manager): manager of the table to update.
+        max_pending (int): number of buffered records that triggers a flush (default: 100).
+        flush_interval (float): seconds between background flushes, None to disable (default: 5).
+        max_workers (int): maximum number of concurrent PATCHes by flush (default: 4).
+        on_flush (callable, optional): called with the BulkResult of each flush, e.g. to log failed updates.
+    """
+
+    def __init__(
+        self,
+        manager,
+        max_pending: int = 100,
+        flush_interval: float = 5,
+        max_workers: int = 4,
+        on_flush=None,
+    ) -> None:
+        self.manager = manager
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self.max_workers = max_workers
+        self.on_flush = on_flush
+        self.__pending = {}
+        self.__lock = threading.Lock()
+        self.__flush_lock = threading.Lock()
+        self.__closed = threading.Event()
+        self.__timer = None
+        self.__error = None
+
+        if flush_interval:
+            self.__timer = threading.Thread(target=self.__run_timer, daemon=True)
+            self.__timer.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.__pending)
+
+    def __run_timer(self):
+        while not self.__closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                self.__error = e
+
+    def __raise_error(self):
+        error, self.__error = self.__error, None
+        if error is not None:
+            raise error
+
+    def update(self, sys_id: str, data: dict):
+        """Buffers field changes of a record, merged with the changes already pending for it
+
+        Args:
+            sys_id (str): sys_id of record to update.
+            data (dict): fields to update.
+        """
+        # the change is not buffered when a background flush has failed since the last call
+        self.__raise_error()
+
+        with self.__lock:
+            self.__pending.setdefault(sys_id, {}).update(data)
+            full = len(self.__pending) >= self.max_pending
+
+        if full:
+            self.flush()
+
+    def flush(self) -> BulkResult:
+        """Sends one PATCH by record with pending changes
+
+        Returns:
+            BulkResult: one BulkItemResult by record, with (sys_id, data) as item.
+        """
+        # flushes are serialized, so two PATCHes of the same record are never reordered
+        with self.__flush_lock:
+            with self.__lock:
+                pending, self.__pending = self.__pending, {}
+
+            if not pending:
+                return BulkResult()
+
+            result = run_concurrently(
+                lambda item: self.manager._update(
+                    item[0], item[1], priority=self.manager.batch_priority
+                ),
+                pending.items(),
+                max_workers=self.max_workers,
+            )
+
+        if self.on_flush:
+            self.on_flush(result)
+        return result
+
+    def close(self) -> BulkResult:
+        """Stops the background flushes and flushes pending changes, then raises the error of a failed background flush
+
+        Returns:
+            BulkResult: result of the last flush.
+        """
+        self.__closed.set()
+        if self.__timer and self.__timer is not threading.current_thread():
+            self.__timer.join()
+        result = self.flush()
+        self.__raise_error()
+        return result
@@ -5,3 +5,6 @@ SERVICENOW_API_TOKEN = os.environ.get("SERVICENOW_API_TOKEN")
 
 SERVICENOW_API_USER = os.environ.get("SERVICENOW_API_USER")
 SERVICENOW_API_PASSWORD = os.environ.get("SERVICENOW_API_PASSWORD")
+
+SERVICENOW_CLIENT_ID = os.environ.get("SERVICENOW_CLIENT_ID")
+SERVICENOW_CLIENT_SECRET = os.environ.get("SERVICENOW_CLIENT_SECRET")
@@ -0,0 +1,75 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from service_now_api_sdk.sdk.servicenow.helpers.client import Client
+from service_now_api_sdk.sdk.servicenow.helpers.query_compiler import compile_query
+from service_now_api_sdk.sdk.servicenow.helpers.query_values import register_collations
+from service_now_api_sdk.sdk.servicenow.mirror.client import Mirror
+
+VALUES = ["9", "10", "1.0", "1", "", "abc", "ABD", "007", "7", "-2", ".5", "Ärger", "ärger"]
+
+QUERIES = [
+    "ORDERBYa^ORDERBYsys_id",
+    "ORDERBYDESCa^ORDERBYsys_id",
+    "a=1",
+    "a=1.0",
+    "a=7",
+    "a=ABC",
+    "a=ÄRGER",
+    "a!=7",
+    "aIN1,7,abc",
+    "aNOT IN1,7,abc",
+    "a>5",
+    "a<=1",
+    "a>=abc",
+    "aBETWEEN1@9",
+    "aISEMPTY",
+    "aISNOTEMPTY^ORDERBYDESCa",
+    "aSTARTSWITHab^ORa=1^ORDERBYa",
+]
+
+
+class MirrorQueryTest(unittest.TestCase):
+    """The mirror (SQL) and compiled queries (Python) must return the same records for the same query"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "mirror.sqlite")
+        self.mirror = Mirror(path, client=Client(url="https://instance.test", token="t"))
+        self.mirror.add("t", fields=["a"], indexes=["a"])
+        self.rows = [
+            {"sys_id": f"{index:02d}", "sys_updated_on": "", "a": value}
+            for index, value in enumerate(VALUES)
+        ]
+        connection = register_collations(sqlite3.connect(path))
+        with connection:
+            connection.executemany(
+                'INSERT INTO "t" ("sys_id", "sys_updated_on", "a") VALUES (?, ?, ?)',
+                [(row["sys_id"], row["sys_updated_on"], row["a"]) for row in self.rows],
+            )
+        connection.close()
+
+    def test_same_results(self):
+        for query in QUERIES:
+            with self.subTest(query=query):
+                mirrored = self.mirror.query("t", query, fields=["sys_id", "a"])
+                compiled = [
+                    {"sys_id": row["sys_id"], "a": row["a"]}
+                    for row in compile_query(query).apply(self.rows)
+                ]
+                if "ORDERBY" not in query:
+                    mirrored.sort(key=lambda row: row["sys_id"])
+                self.assertEqual(mirrored, compiled)
+
+    def test_numbers_are_ordered_as_numbers(self):
+        mirrored = self.mirror.query("t", "aISNOTEMPTY^ORDERBYDESCa", fields=["a"])
+        self.assertEqual(
+            [row["a"] for row in mirrored][-8:], ["10", "9", "7", "007", "1.0", "1", ".5", "-2"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
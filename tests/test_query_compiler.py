@@ -0,0 +1,41 @@
+import unittest
+from decimal import Decimal
+
+from service_now_api_sdk.sdk.servicenow.helpers.query_compiler import compile_query
+
+
+def numbers(query: str, rows: list) -> list:
+    return [row["n"] for row in compile_query(query).apply(rows)]
+
+
+class EqualityTest(unittest.TestCase):
+    rows = [{"n": "007"}, {"n": "7"}, {"n": "1.0"}, {"n": "1"}, {"n": "INC7"}, {"n": ""}]
+
+    def test_equals_compares_text(self):
+        self.assertEqual(numbers("n=7", self.rows), ["7"])
+        self.assertEqual(numbers("n=007", self.rows), ["007"])
+        self.assertEqual(numbers("n=1", self.rows), ["1"])
+        self.assertEqual(numbers("n=1.0", self.rows), ["1.0"])
+
+    def test_not_equals_compares_text(self):
+        self.assertEqual(numbers("n!=7", self.rows), ["007", "1.0", "1", "INC7", ""])
+
+    def test_in_compares_text(self):
+        self.assertEqual(numbers("nIN7,1", self.rows), ["7", "1"])
+        self.assertEqual(numbers("nNOT IN007,1.0", self.rows), ["7", "1", "INC7", ""])
+
+    def test_equals_is_case_insensitive(self):
+        self.assertEqual(numbers("n=inc7", self.rows), ["INC7"])
+
+    def test_native_numbers_are_compared_as_numbers(self):
+        rows = [{"n": 7}, {"n": 7.0}, {"n": Decimal("1.0")}, {"n": True}]
+        self.assertEqual(numbers("n=7", rows), [7, 7.0])
+        self.assertEqual(numbers("nIN1", rows), [Decimal("1.0")])
+
+    def test_ranges_compare_numbers(self):
+        self.assertEqual(numbers("n>=7", self.rows), ["007", "7", "INC7"])
+        self.assertEqual(numbers("n<2", self.rows), ["1.0", "1"])
+
+
+if __name__ == "__main__":
+    unittest.main()